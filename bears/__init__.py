@@ -1,5 +1,5 @@
 from .dataframe import DataFrame
 from .series import Series
-from .utils import read_csv
+from .utils import read_binary, read_csv
 
-__all__ = ["DataFrame", "read_csv", "Series"]
+__all__ = ["DataFrame", "read_binary", "read_csv", "Series"]
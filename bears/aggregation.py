@@ -0,0 +1,300 @@
+"""
+One-pass aggregation of numeric columns.
+
+Count, mean, standard deviation (Welford's algorithm), min and max come out
+of a single pass over the column, and all the requested percentiles out of a
+single sort of its non-missing values.
+"""
+from array import array
+import builtins
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+from .kernels import Buffer, to_owned
+
+STATISTICS = ("count", "mean", "std", "min", "max")
+
+_NAN = float("NaN")
+
+Func = Union[str, float]
+# count, mean, sum of squared deviations, min, max
+Moments = Tuple[int, float, float, Any, Any]
+
+
+def parse_func(func: str) -> Func:
+    """
+    Returns the statistic name, or the rank of a percentile given as "25%".
+    """
+    if func in STATISTICS:
+        return func
+    if func.endswith("%"):
+        try:
+            rank = float(func[:-1]) / 100
+        except ValueError:
+            pass
+        else:
+            if not 0 < rank < 1:
+                raise ValueError("Rank must be in range [0, 1]")
+            return rank
+    raise ValueError(f"Unknown aggregation: {func}")
+
+
+def aggregate(
+    data: Buffer,
+    funcs: Sequence[Func],
+    moments_: Optional[Moments] = None,
+    sorted_data: Optional[Sequence[Any]] = None,
+) -> List[float]:
+    """
+    Computes funcs (parsed by parse_func) over data, ignoring NaN. The
+    moments and sorted non-NaN values of data are computed unless given.
+    """
+    count, mean, m2, min_, max_ = moments(data) if moments_ is None else moments_
+    if sorted_data is None and any(isinstance(func, float) for func in funcs):
+        sorted_data = sorted(e for e in data if e == e)
+
+    out = []
+    for func in funcs:
+        if func == "count":
+            out.append(float(count))
+        elif not count:
+            out.append(_NAN)
+        elif func == "mean":
+            out.append(mean)
+        elif func == "std":
+            out.append((m2 / count) ** 0.5)
+        elif func == "min":
+            out.append(min_)
+        elif func == "max":
+            out.append(max_)
+        else:
+            out.append(sorted_data[int(func * count)])  # type: ignore
+    return out
+
+
+def aggregate_columns(
+    cols: Sequence[Buffer], funcs: Sequence[Func], n_jobs: int = 1
+) -> List[List[float]]:
+    """
+    Aggregates every column, in n_jobs worker processes if n_jobs > 1.
+    """
+    if n_jobs <= 1 or len(cols) <= 1:
+        return [aggregate(col, funcs) for col in cols]
+    # memory maps can't be sent to the workers
+    cols = [to_owned(col) if isinstance(col, memoryview) else col for col in cols]
+    with ProcessPoolExecutor(n_jobs) as executor:
+        return list(executor.map(aggregate, cols, [funcs] * len(cols)))
+
+
+def histogram(
+    data: Buffer,
+    bins: int,
+    range: Tuple[float, float],
+    codes: Optional[Sequence[int]] = None,
+    ngroups: int = 1,
+    density: bool = False,
+) -> Tuple[List[float], List[List[float]]]:
+    """
+    Counts the non-NaN values of data in bins equal-width bins between the
+    bounds of range, the last bin including its upper edge, in one pass. With
+    codes, every value is counted in the histogram of its group code (values
+    with a negative code are skipped). Returns the bin edges and the counts of
+    every group, divided by count * bin width if density is set.
+    """
+    low, high, width, edges = _bin_edges(bins, range)
+    counts = [[0] * bins for _ in builtins.range(ngroups)]
+    last = bins - 1
+    if codes is None:
+        codes = repeat(0)  # type: ignore
+    for e, code in zip(data, codes):  # type: ignore
+        if code < 0 or not low <= e <= high:
+            continue
+        i = int((e - low) / width)
+        counts[code][i if i < last else last] += 1
+
+    if not density:
+        return edges, counts  # type: ignore
+    out = []
+    for group in counts:
+        total = sum(group) * width
+        out.append([c / total if total else _NAN for c in group])
+    return edges, out
+
+
+def histogram2d(
+    x: Buffer,
+    y: Buffer,
+    bins: Tuple[int, int],
+    range: Tuple[Tuple[float, float], Tuple[float, float]],
+    codes: Optional[Sequence[int]] = None,
+    ngroups: int = 1,
+) -> Tuple[List[float], List[float], List[List[List[int]]]]:
+    """
+    Counts the pairs of non-NaN values of x and y in a grid of bins[0] by
+    bins[1] equal-width cells, in one pass, with the same edge and group
+    code rules as histogram. Returns the edges of x and y, and the counts of
+    every group as one row per bin of y.
+    """
+    x_low, x_high, x_width, x_edges = _bin_edges(bins[0], range[0])
+    y_low, y_high, y_width, y_edges = _bin_edges(bins[1], range[1])
+
+    counts = [
+        [[0] * bins[0] for _ in builtins.range(bins[1])]
+        for _ in builtins.range(ngroups)
+    ]
+    x_last, y_last = bins[0] - 1, bins[1] - 1
+    if codes is None:
+        codes = repeat(0)  # type: ignore
+    for a, b, code in zip(x, y, codes):  # type: ignore
+        if code < 0 or not x_low <= a <= x_high or not y_low <= b <= y_high:
+            continue
+        i = int((a - x_low) / x_width)
+        j = int((b - y_low) / y_width)
+        counts[code][j if j < y_last else y_last][i if i < x_last else x_last] += 1
+    return x_edges, y_edges, counts
+
+
+def kde(
+    data: Buffer,
+    bandwidth: float,
+    range: Tuple[float, float],
+    points: int = 256,
+) -> Tuple[List[float], List[float]]:
+    """
+    Gaussian kernel density estimate of the non-NaN values of data on points
+    equally spaced positions between the bounds of range, by linear binning:
+    every value is split between its two nearest positions in one pass, then
+    the binned weights are convolved with the kernel, truncated at 4
+    bandwidths. Costs O(len(data) + points * kernel width) instead of
+    O(len(data) * points) for the exact estimate. Returns the positions and
+    the densities.
+    """
+    if points < 2:
+        raise ValueError("'points' must be at least 2")
+    if bandwidth <= 0:
+        raise ValueError("'bandwidth' must be positive")
+    low, high = range
+    if low >= high:
+        raise ValueError("max must be larger than min in range parameter")
+    step = (high - low) / (points - 1)
+    grid = [low + i * step for i in builtins.range(points - 1)] + [high]
+
+    weights = [0.0] * points
+    count = 0
+    last = points - 1
+    for e in data:
+        if not low <= e <= high:
+            continue
+        count += 1
+        t = (e - low) / step
+        i = int(t)
+        if i >= last:
+            weights[last] += 1
+            continue
+        frac = t - i
+        weights[i] += 1 - frac
+        weights[i + 1] += frac
+    if not count:
+        return grid, [_NAN] * points
+
+    # Kernel values at every offset in steps, scaled so that the estimate
+    # integrates to 1
+    reach = min(int(4 * bandwidth / step), last)
+    scale = 1 / (count * bandwidth * math.sqrt(2 * math.pi))
+    kernel = [
+        scale * math.exp(-0.5 * (k * step / bandwidth) ** 2)
+        for k in builtins.range(reach + 1)
+    ]
+    density = [0.0] * points
+    for i, w in enumerate(weights):
+        if not w:
+            continue
+        for j in builtins.range(max(i - reach, 0), min(i + reach, last) + 1):
+            density[j] += w * kernel[abs(i - j)]
+    return grid, density
+
+
+def moments(data: Buffer) -> Moments:
+    """
+    Returns the count, mean, sum of squared deviations, min and max of the
+    non-NaN values of data.
+    """
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    min_ = max_ = _NAN
+    for e in data:
+        if e != e:
+            continue
+        if not count:
+            min_ = max_ = e
+        elif e < min_:
+            min_ = e
+        elif e > max_:
+            max_ = e
+        count += 1
+        delta = e - mean
+        mean += delta / count
+        m2 += delta * (e - mean)
+    return count, mean, m2, min_, max_
+
+
+def pearson(
+    x: Buffer,
+    y: Buffer,
+    x_moments: Optional[Moments] = None,
+    y_moments: Optional[Moments] = None,
+) -> float:
+    """
+    Pearson correlation coefficient of paired values, which must not be
+    missing. Passing the cached moments of x and y saves a pass over them.
+    NaN for fewer than 2 pairs or a constant side.
+    """
+    count, x_mean, x_m2, _, _ = moments(x) if x_moments is None else x_moments
+    _, y_mean, y_m2, _, _ = moments(y) if y_moments is None else y_moments
+    if count < 2 or not x_m2 or not y_m2:
+        return _NAN
+    cross = sum((a - x_mean) * (b - y_mean) for a, b in zip(x, y))
+    return max(-1.0, min(1.0, cross / math.sqrt(x_m2 * y_m2)))
+
+
+def ranks(data: Buffer, order: Optional[Sequence[int]] = None) -> array:
+    """
+    1-based ranks of data, tied values sharing the average of their ranks.
+    order, the indices of data in ascending order of value, saves the sort
+    if cached; indices missing from it get a NaN rank.
+    """
+    if order is None:
+        order = sorted(builtins.range(len(data)), key=data.__getitem__)
+    out = array("d", [_NAN]) * len(data)
+    start = 0
+    while start < len(order):
+        end = start + 1
+        value = data[order[start]]
+        while end < len(order) and data[order[end]] == value:
+            end += 1
+        rank = (start + end + 1) / 2
+        for i in builtins.range(start, end):
+            out[order[i]] = rank
+        start = end
+    return out
+
+
+def _bin_edges(
+    bins: int, range: Tuple[float, float]
+) -> Tuple[float, float, float, List[float]]:
+    """
+    Lower and upper edges (widened by 0.5 if they are equal), bin width and
+    edges of bins equal-width bins.
+    """
+    if bins < 1:
+        raise ValueError("'bins' must be a positive integer")
+    low, high = range
+    if low > high:
+        raise ValueError("max must be larger than min in range parameter")
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    width = (high - low) / bins
+    return low, high, width, [low + i * width for i in builtins.range(bins)] + [high]
@@ -0,0 +1,147 @@
+"""
+Columnar binary layout of a DataFrame.
+
+    magic (8 bytes) | header size (8 bytes, little endian) | json header
+    | column buffers, each aligned on 8 bytes
+
+The header holds the number of rows, the byte order and, for every column,
+its name, dtype, the offset and size of its data buffer, for str columns the
+dictionary the data buffer holds codes of and, for columns with missing
+values, the offset and size of their validity bitmap (one bit per row, least
+significant first). Numeric and boolean buffers are stored as the raw bytes
+of their typed array, so they can be used straight from a memory map.
+"""
+from array import array
+import json
+import mmap as mmap_
+import sys
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from . import bitmap
+from .bitmap import Bitmap
+from .kernels import TYPECODES, Buffer
+
+MAGIC = b"BEARS\x00\x00\x01"
+# Version 2 added validity bitmaps
+VERSION = 2
+ALIGNMENT = 8
+_CODES_TYPECODE = "I"
+_DTYPES = {dtype.__name__: dtype for dtype in (bool, float, int, str)}
+
+
+def write(
+    path: str, cols: List[Tuple[Optional[str], type, Buffer, Bitmap]], nrows: int
+) -> None:
+    """
+    Writes (name, dtype, buffer, validity) columns to path.
+    """
+    payloads: List[memoryview] = []
+    meta: List[Dict[str, Any]] = []
+    offset = 0
+    for name, dtype, data, validity in cols:
+        col_meta: Dict[str, Any] = {"name": name, "dtype": dtype.__name__}
+        if dtype == str:
+            codes, dictionary = _encode(data)
+            col_meta["dictionary"] = dictionary
+            payload = memoryview(codes)
+        else:
+            if isinstance(data, list):
+                raise ValueError(f"Column {name} doesn't fit in a {dtype} buffer")
+            payload = memoryview(data)
+        col_meta["offset"] = offset
+        col_meta["nbytes"] = payload.nbytes
+        payloads.append(payload)
+        offset += _padded(payload.nbytes)
+        if validity is not None:
+            payload = memoryview(bitmap.to_bytes(validity, nrows))
+            col_meta["validity"] = {"offset": offset, "nbytes": payload.nbytes}
+            payloads.append(payload)
+            offset += _padded(payload.nbytes)
+        meta.append(col_meta)
+
+    header = json.dumps(
+        {
+            "version": VERSION,
+            "byteorder": sys.byteorder,
+            "nrows": nrows,
+            "columns": meta,
+        }
+    ).encode("utf8")
+    header += b" " * (_padded(len(header)) - len(header))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for payload in payloads:
+            f.write(payload)
+            f.write(b"\0" * (_padded(payload.nbytes) - payload.nbytes))
+
+
+def read(
+    path: str, mmap: bool = True
+) -> Tuple[List[Tuple[str, type, Buffer, Bitmap]], int]:
+    """
+    Reads the columns written by write. With mmap, numeric and boolean
+    buffers are copy-on-write views of the file: nothing is read before it is
+    used, and writes never reach the file. Validity bitmaps are always read,
+    and str columns always decoded: their values are Python strings, made
+    of the dictionary in the header.
+    """
+    with open(path, "rb") as f:
+        header, start = _read_header(f)
+        if mmap:
+            content = memoryview(mmap_.mmap(f.fileno(), 0, access=mmap_.ACCESS_COPY))
+        else:
+            f.seek(0)
+            content = memoryview(f.read())
+
+    swap = header["byteorder"] != sys.byteorder
+    cols = []
+    for col_meta in header["columns"]:
+        dtype = _DTYPES[col_meta["dtype"]]
+        begin = start + col_meta["offset"]
+        raw = content[begin : begin + col_meta["nbytes"]]
+        if dtype == str:
+            codes = _to_array(raw, _CODES_TYPECODE, swap)
+            dictionary = col_meta["dictionary"]
+            data: Buffer = [dictionary[code] for code in codes]
+        elif mmap and not swap:
+            data = raw.cast(TYPECODES[dtype])  # type: ignore
+        else:
+            data = _to_array(raw, TYPECODES[dtype], swap)
+        validity = None
+        if "validity" in col_meta:
+            begin = start + col_meta["validity"]["offset"]
+            raw = content[begin : begin + col_meta["validity"]["nbytes"]]
+            validity = bitmap.from_bytes(raw.tobytes(), header["nrows"])
+        cols.append((col_meta["name"], dtype, data, validity))
+    return cols, header["nrows"]
+
+
+def _encode(data: Buffer) -> Tuple[array, List[str]]:
+    index: Dict[str, int] = {}
+    codes = array(_CODES_TYPECODE, [index.setdefault(e, len(index)) for e in data])
+    return codes, list(index)
+
+
+def _padded(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _read_header(f: BinaryIO) -> Tuple[Dict[str, Any], int]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{f.name} is not a bears binary file")
+    size = int.from_bytes(f.read(8), "little")
+    header = json.loads(f.read(size).decode("utf8"))
+    if header["version"] > VERSION:
+        raise ValueError(f"Unsupported bears binary version {header['version']}")
+    return header, len(MAGIC) + 8 + size
+
+
+def _to_array(raw: memoryview, typecode: str, swap: bool) -> array:
+    out = array(typecode)
+    out.frombytes(raw)
+    if swap:
+        out.byteswap()
+    return out
@@ -0,0 +1,125 @@
+"""
+Validity bitmaps of Series.
+
+A bitmap is a Python int whose bit i is set if row i holds a value, and None
+when every row does, so that combining the bitmaps of several columns is a
+single big-integer operation. Conversions to and from masks (bytes holding
+one 0 or 1 per row) go through str.translate and int(..., 2), which run in C.
+"""
+from itertools import compress
+from typing import Iterable, Optional, Sequence
+
+Bitmap = Optional[int]
+
+_MASK_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_DIGITS_TO_MASK = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def from_mask(mask: Iterable[int], size: int) -> Bitmap:
+    """
+    Returns the bitmap of a mask, None if the mask is all ones.
+    """
+    mask = bytes(mask)
+    if len(mask) != size:
+        raise ValueError(f"Expected a mask of size {size}, got {len(mask)}")
+    if b"\x00" not in mask:
+        return None
+    if b"\x01" not in mask:
+        return 0
+    return int(mask.translate(_MASK_TO_DIGITS)[::-1], 2)
+
+
+def to_mask(bitmap: Bitmap, size: int) -> bytes:
+    """
+    Returns one byte per row, 1 if the row holds a value, 0 otherwise.
+    """
+    if bitmap is None:
+        return b"\x01" * size
+    digits = format(bitmap, "b").encode("ascii")[::-1]
+    return digits.translate(_DIGITS_TO_MASK).ljust(size, b"\x00")[:size]
+
+
+def and_(lhs: Bitmap, rhs: Bitmap) -> Bitmap:
+    if lhs is None:
+        return rhs
+    if rhs is None:
+        return lhs
+    return lhs & rhs
+
+
+def concat(lhs: Bitmap, lhs_size: int, rhs: Bitmap, rhs_size: int) -> Bitmap:
+    if lhs is None and rhs is None:
+        return None
+    if lhs is None:
+        lhs = (1 << lhs_size) - 1
+    if rhs is None:
+        rhs = (1 << rhs_size) - 1
+    return lhs | rhs << lhs_size
+
+
+def get(bitmap: Bitmap, size: int, i: int) -> bool:
+    """Whether row i (negative from the end) holds a value, a single bit test"""
+    if bitmap is None:
+        return True
+    return _bit(bitmap, size, i + size if i < 0 else i)
+
+
+def set_(bitmap: Bitmap, size: int, i: int, valid: bool) -> Bitmap:
+    """Bitmap with row i (negative from the end) set as valid or not"""
+    if i < 0:
+        i += size
+    if valid:
+        if bitmap is None or _bit(bitmap, size, i):
+            return bitmap
+        bitmap |= 1 << i
+        return None if bitmap == (1 << size) - 1 else bitmap
+    if bitmap is None:
+        bitmap = (1 << size) - 1
+    return bitmap & ~(1 << i)
+
+
+def take(bitmap: Bitmap, size: int, index: Sequence[int]) -> Bitmap:
+    """Bitmap of the rows at index"""
+    if bitmap is None:
+        return None
+    mask = to_mask(bitmap, size)
+    return from_mask(map(mask.__getitem__, index), len(index))
+
+
+def slice_(bitmap: Bitmap, size: int, key: slice) -> Bitmap:
+    if bitmap is None:
+        return None
+    start, stop, step = key.indices(size)
+    if step == 1:
+        length = max(stop - start, 0)
+        out = bitmap >> start & (1 << length) - 1
+        return None if out == (1 << length) - 1 else out
+    mask = to_mask(bitmap, size)[key]
+    return from_mask(mask, len(mask))
+
+
+def valid(values: Iterable, bitmap: Bitmap, size: int) -> Iterable:
+    """The values of the rows holding one"""
+    if bitmap is None:
+        return values
+    return compress(values, to_mask(bitmap, size))
+
+
+def to_bytes(bitmap: Bitmap, size: int) -> bytes:
+    """Bits packed least significant first, as stored in binary files"""
+    if bitmap is None:
+        bitmap = (1 << size) - 1
+    return bitmap.to_bytes((size + 7) // 8, "little")
+
+
+def from_bytes(data: bytes, size: int) -> Bitmap:
+    bitmap = int.from_bytes(data, "little") & (1 << size) - 1
+    return None if bitmap == (1 << size) - 1 else bitmap
+
+
+def _bit(bitmap: int, size: int, i: int) -> bool:
+    # Both cost a copy of the bits on one side of i: below it for the mask,
+    # above it for the shift
+    if i < size // 2:
+        return bool(bitmap & 1 << i)
+    return bool(bitmap >> i & 1)
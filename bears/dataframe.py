@@ -1,8 +1,23 @@
+from array import array
 from collections import defaultdict
 import csv
+from itertools import chain, combinations_with_replacement, compress, islice
 import os
-from typing import Any, Collection, Dict, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    Collection,
+    DefaultDict,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
+from . import aggregation, binary, bitmap, groupby, parser
 from .series import Series
 from .i_hate_42 import min_
 
@@ -10,22 +25,72 @@ from .i_hate_42 import min_
 class DataFrame:
     """
     A DataFrame is an aggregation of Series objects
+
+    Selecting rows returns a view: it shares the columns of its parent and a
+    vector of row indices, and only gathers a column the first time it is
+    read. Columns of a view are thus gathered from the parent's data as it is
+    at that time.
     """
 
     def __init__(self, cols: List[Series], names: Optional[Collection[str]] = None):
-        self._cols = cols
+        # Columns of a view are None until they are gathered from _source
+        self._columns: List[Optional[Series]] = cols  # type: ignore
+        self._source: Optional[List[Series]] = None
+        self._rows: Optional[array] = None
         self._nrows = 0 if len(cols) == 0 else len(cols[0])
         self._names = {} if names is None else {name: i for i, name in enumerate(names)}
         self._id2names = ["" for _ in range(len(self._names))]
         for name, i in self._names.items():
             self._id2names[i] = name
 
+    @property
+    def _cols(self) -> List[Series]:
+        """All the columns, a view gathering the ones it has not yet"""
+        if self._rows is not None:
+            for i in range(len(self._columns)):
+                self._col(i)
+            self._source = self._rows = None
+        return self._columns  # type: ignore
+
     @property
     def columns(self):
         if self._names:
             return Series(self._id2names, str)
         return Series(range(len(self)), int)
 
+    def agg(self, funcs: Sequence[str], n_jobs: int = 1) -> "DataFrame":
+        """
+        Aggregates every column, ignoring missing values. Returns a DataFrame with the
+        same columns and one row per function, in the order of funcs.
+
+        Args:
+            funcs: any of "count", "mean", "std", "min", "max" and
+                percentiles such as "25%"
+            n_jobs: the number of processes the columns are spread over
+        """
+        parsed = [aggregation.parse_func(func) for func in funcs]
+        for col in self._cols:
+            if col.dtype not in {bool, int, float}:
+                raise ValueError(f"Not defined for Series of dtype {col.dtype}")
+        if n_jobs > 1:
+            results = aggregation.aggregate_columns(
+                [col._valid_data() for col in self._cols], parsed, n_jobs
+            )
+        else:
+            # Goes through the order statistics cached on the columns
+            ranks = any(isinstance(func, float) for func in parsed)
+            results = [
+                aggregation.aggregate(
+                    col._data,
+                    parsed,
+                    col._moments(),
+                    col._sorted() if ranks else None,
+                )
+                for col in self._cols
+            ]
+        cols = [Series._from_data(array("d", values), float) for values in results]
+        return DataFrame(cols, self._id2names if self._names else None)
+
     def append(self, df: "DataFrame"):
         if (
             self._names != df._names
@@ -34,61 +99,181 @@ class DataFrame:
         ):
             raise ValueError("Incompatible DataFrames")
         for c1, c2 in zip(self._cols, df._cols):
-            c1._data.extend(c2._data)
+            c1._extend(c2)
         self._nrows += df._nrows
 
-    def describe(self):
-        features = self._get_numeric_data()
-        cols = [col.dropna() for col in features._cols]
+    def corr(self, method: str = "pearson") -> "DataFrame":
+        """
+        Correlation matrix of the numeric columns, each pair of columns being
+        compared on the rows where neither is missing. Returns a DataFrame
+        with one column per numeric column, row i holding the correlations
+        with the i-th of them.
+
+        Args:
+            method: "pearson", or "spearman" for the Pearson correlation of
+                the ranks
+        """
+        if method not in ("pearson", "spearman"):
+            raise ValueError(f"Unknown correlation method: {method}")
+        numeric = [i for i in range(len(self)) if self._dtype(i) in {bool, int, float}]
+        cols = [self._col(i) for i in numeric]
+        notnas = [col._notna() for col in cols]
+        # Values and moments of every column, shared by every pair of columns
+        # that are missing on the same rows
+        if method == "pearson":
+            values = [col._valid_data() for col in cols]
+            moments = [col._moments() for col in cols]
+        else:
+            values = [col._ranks() for col in cols]
+            moments = [aggregation.moments(ranks) for ranks in values]
+
+        out = [array("d", bytes(8 * len(cols))) for _ in cols]
+        for i, j in combinations_with_replacement(range(len(cols)), 2):
+            both = bitmap.and_(notnas[i], notnas[j])
+            if both == notnas[i] and both == notnas[j]:
+                r = aggregation.pearson(values[i], values[j], moments[i], moments[j])
+            else:
+                x, y = (
+                    Series._buffer(bitmap.valid(col._data, both, self._nrows), float)
+                    for col in (cols[i], cols[j])
+                )
+                if method == "spearman":
+                    x, y = aggregation.ranks(x), aggregation.ranks(y)
+                r = aggregation.pearson(x, y)
+            out[i][j] = out[j][i] = r
+        cols = [Series._from_data(data, float) for data in out]
+        return DataFrame(
+            cols, [self._id2names[i] for i in numeric] if self._names else None
+        )
+
+    def describe(self, n_jobs: int = 1):
+        numeric = [i for i in range(len(self)) if self._dtype(i) in {int, float}]
+        features = DataFrame(
+            [self._col(i) for i in numeric],
+            [self._id2names[i] for i in numeric] if self._names else None,
+        )
         if features._names:
             names = features._id2names
         else:
-            names = [f"f{i}" for i in len(features)]
+            names = [f"f{i}" for i in range(len(features))]
         to_retrieve = [
-            ("Count", "__len__", ()),
-            ("Mean", "mean", ()),
-            ("Std", "std", ()),
-            ("Min", "min", ()),
-            ("25%", "percentile", (0.25,)),
-            ("50%", "percentile", (0.50,)),
-            ("75%", "percentile", (0.75,)),
-            ("Max", "max", ()),
+            ("Count", "count"),
+            ("Mean", "mean"),
+            ("Std", "std"),
+            ("Min", "min"),
+            ("25%", "25%"),
+            ("50%", "50%"),
+            ("75%", "75%"),
+            ("Max", "max"),
         ]
+        stats = features.agg([func for _, func in to_retrieve], n_jobs)
         data = ["", *names]
         field_str = "{:>{w}.{w}}"
         value_str = "{:>{w}.1f}"
-        out = ["|" + (field_str + "|") * (len(cols) + 1) + "\n"]
-        for row_name, func, args in to_retrieve:
+        out = ["|" + (field_str + "|") * (len(features) + 1) + "\n"]
+        for row_i, (row_name, _) in enumerate(to_retrieve):
             data.append(row_name)
             out.append("|" + field_str + "|")
-            data.extend(float(col.__getattribute__(func)(*args)) for col in cols)
-            out.append((value_str + "|") * len(cols) + "\n")
+            data.extend(stats._get_row(row_i))
+            out.append((value_str + "|") * len(features) + "\n")
         try:
             _, w = os.popen("stty size", "r").read().split()
         except ValueError:
             w = 140
-        print("".join(out).format(*data, w=int(w) // (len(cols) + 3)))
+        print("".join(out).format(*data, w=int(w) // (len(features) + 3)))
 
     def dropna(self):
         """
-        Returns a new DataFrame where all the rows containing NaN are dropped.
+        Returns a new DataFrame where all the rows containing missing values
+        are dropped.
         """
-        index = None
+        notna = None
         for col in self._cols:
-            if col.dtype != float:
-                continue
-            mask = col == col
-            if index is None:
-                index = mask
-            else:
-                index = index & mask
-        return self[index]
+            notna = bitmap.and_(notna, col._notna())
+        mask = bitmap.to_mask(notna, self._nrows)
+        index = array("q", compress(range(self._nrows), mask))
+        return self[Series._from_data(index, int)]
+
+    def groupby(self, key: str) -> "groupby.GroupBy":
+        """
+        Groups the rows by the values of the key column, in one pass over it.
+        """
+        return groupby.GroupBy(self, key)
+
+    def histogram2d(
+        self,
+        x: str,
+        y: str,
+        bins: Union[int, Tuple[int, int]] = 100,
+        range: Optional[Tuple[Tuple[float, float], Tuple[float, float]]] = None,
+        by: Optional[str] = None,
+    ) -> Tuple[List[float], List[float], Any]:
+        """
+        Counts the rows in a grid of cells over columns x and y, skipping
+        rows where either is missing, in one pass over them. Returns the
+        edges of x and y and the counts as one row per bin of y, or the
+        counts of every group by key if grouped by column by.
+
+        Args:
+            x, y: names of numeric columns
+            bins: the number of bins of both columns, or of x and y
+            range: the lower and upper edges of x and y, their cached min
+                and max by default
+            by: name of a column to count every value of separately
+        """
+        x_col, y_col = self[x], self[y]
+        for col in (x_col, y_col):
+            if col.dtype not in {bool, int, float}:  # type: ignore
+                raise ValueError(f"Not defined for Series of dtype {col.dtype}")
+        if isinstance(bins, int):
+            bins = (bins, bins)
+        if range is None:
+            range = (
+                (x_col.min(), x_col.max()),  # type: ignore
+                (y_col.min(), y_col.max()),  # type: ignore
+            )
+        groups = None if by is None else self.groupby(by)
+        codes = None if groups is None else groups._codes
+        codes = y_col._histogram_codes(x_col._histogram_codes(codes))  # type: ignore
+        x_edges, y_edges, counts = aggregation.histogram2d(
+            x_col._data,  # type: ignore
+            y_col._data,  # type: ignore
+            bins,
+            range,
+            codes,
+            1 if groups is None else groups.ngroups,
+        )
+        if groups is None:
+            return x_edges, y_edges, counts[0]
+        return x_edges, y_edges, dict(zip(groups._keys, counts))
 
     def isna(self):
-        cols = [(col == col) for col in self._cols]
+        """Boolean DataFrame, True where values are missing"""
+        cols = [col.isna() for col in self._cols]
         names = self._id2names if self._names else None
         return DataFrame(cols, names)
 
+    @staticmethod
+    def read_binary(filepath: str, mmap: bool = True) -> "DataFrame":
+        """
+        Reads a DataFrame written by DataFrame.to_binary.
+
+        Args:
+            filepath: the path to the binary file
+            mmap: whether to memory-map the numeric and boolean columns
+                instead of reading them. Mapped pages are copy-on-write, so
+                modifying the DataFrame never modifies the file.
+        """
+        cols, _ = binary.read(filepath, mmap)
+        names = [name for name, _, _, _ in cols]
+        return DataFrame(
+            [
+                Series._from_data(data, dtype, validity)
+                for _, dtype, data, validity in cols
+            ],
+            names=names if all(name is not None for name in names) else None,
+        )
+
     @staticmethod
     def read_csv(
         filepath: str,
@@ -99,7 +284,9 @@ class DataFrame:
         skiprows: int = 0,
         nrows: int = None,
         encoding: str = "utf8",
-    ) -> "DataFrame":
+        chunksize: Optional[int] = None,
+        verbose: bool = False,
+    ) -> Union["DataFrame", Iterator["DataFrame"]]:
         """
         Guess what, this method reads a csv into a DataFrame.
 
@@ -113,11 +300,45 @@ class DataFrame:
             skiprows: the number of rows to skip BEFORE the header (if any)
             nrows: the maximum number of rows to retrieve.
             encoding: the encoding used in the csv file
+            chunksize: if set, returns an iterator of DataFrames of at most
+                chunksize rows instead. All chunks share the dtypes inferred
+                from the first rows of the file.
+            verbose: print the conversion throughput of every column
         """
         if names is not None and header is True:
             raise ValueError("'names' and 'header' are incompatible")
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("'chunksize' must be a positive integer")
+
+        f = open(filepath, mode="r", encoding=encoding)
+        chunks = DataFrame._read_csv_chunks(
+            f, sep, header, names, dtype, skiprows, nrows, chunksize, verbose
+        )
+        if chunksize is not None:
+            return chunks
+        try:
+            return next(chunks)
+        finally:
+            chunks.close()
 
-        with open(filepath, mode="r", encoding=encoding) as f:
+    @staticmethod
+    def _read_csv_chunks(
+        f: TextIO,
+        sep: str,
+        header: bool,
+        names: Optional[Collection[str]],
+        dtype: Union[type, Dict[Union[int, str], type], None],
+        skiprows: int,
+        nrows: Optional[int],
+        chunksize: Optional[int],
+        verbose: bool,
+    ) -> Iterator["DataFrame"]:
+        """
+        Yields the csv as DataFrames of at most chunksize rows (all of them if
+        chunksize is None), and at least one DataFrame even if it is empty.
+        Closes f when done.
+        """
+        with f:
             csvdata = csv.reader(f, delimiter=sep)
 
             for i in range(skiprows):
@@ -126,60 +347,207 @@ class DataFrame:
             if header:
                 names = next(csvdata)
 
-            cols: List[List[str]] = []
-            for row_i, row in enumerate(csvdata):
+            dtype_map = DataFrame._dtype_map(dtype, names)
+            rows = csvdata if nrows is None else islice(csvdata, nrows)
+
+            # The schema is inferred once, from a sample of rows, so that all
+            # the chunks share it
+            sample = list(islice(rows, parser.SAMPLE_ROWS))
+            ncols = len(sample[0]) if sample else 0
+            DataFrame._check_row_sizes(sample, ncols, skiprows + int(header))
+            sample_cols = parser.transpose(sample, ncols)
+            dtypes = [
+                dtype_map[i] or parser.infer_dtype(sample_cols[i])  # type: ignore
+                for i in range(ncols)
+            ]
+            # Inferred dtypes widen when a later cell doesn't fit, unless the
+            # chunks would then disagree on them
+            inferred = [not dtype_map[i] for i in range(ncols)]
+            del sample_cols
+
+            stats = parser.ParseStats(
+                names if names is not None else [str(i) for i in range(ncols)]
+            )
+            rows = chain(sample, rows)
+            block_rows = chunksize or parser.BLOCK_ROWS
+            row_i = 0
+            columns: List[Series] = []
+            while True:
+                block = list(islice(rows, block_rows))
+                if row_i > 0 and not block:
+                    break
+                block_start = skiprows + int(header) + row_i
+                DataFrame._check_row_sizes(block, ncols, block_start)
+                rows_before = row_i
+                row_i += len(block)
+                block_cols = parser.transpose(block, ncols)
+                del block
+                block_series = []
+                for i in range(ncols):
+                    try:
+                        data, validity = stats.convert(
+                            i, block_cols[i], dtypes[i], inferred[i]
+                        )
+                    except parser.ConversionError as e:
+                        if chunksize is not None or not inferred[i]:
+                            raise DataFrame._conversion_error(
+                                e, names, i, block_start, inferred[i]
+                            ) from None
+                        dtypes[i] = parser.widen(dtypes[i], block_cols[i])
+                        if columns and dtypes[i] == str:
+                            # str of the converted values may not spell the
+                            # cells, which are read again instead
+                            cells = DataFrame._reread_column(
+                                f, sep, skiprows + int(header), i, rows_before
+                            )
+                            data, validity = parser.convert(cells, str)
+                            columns[i] = Series._from_data(data, str, validity)
+                        elif columns:
+                            columns[i] = Series(list(columns[i]), dtypes[i])
+                        data, validity = stats.convert(i, block_cols[i], dtypes[i])
+                    block_series.append(Series._from_data(data, dtypes[i], validity))
+                del block_cols
+
+                if chunksize is None:
+                    if not columns:
+                        columns = block_series
+                    else:
+                        for col, block_col in zip(columns, block_series):
+                            col._extend(block_col)
+                else:
+                    yield DataFrame(block_series, names=names)
                 if row_i == 0:
-                    cols.extend([] for _ in row)
-                if nrows is not None and row_i == nrows:
                     break
-                if len(row) != len(cols):
-                    raise ValueError(
-                        f"Invalid number of columns at row "
-                        f"{skiprows + row_i + int(header)}"
-                    )
-                for i in range(len(row)):
-                    cols[i].append(row[i])
-
-            if isinstance(dtype, type):
-                dtype_map = defaultdict(lambda: dtype)  # type: ignore
-            elif isinstance(dtype, Dict):
-                dtype_map = defaultdict(lambda: None, dtype)
-                if names is not None:
-                    dtype_map.update(
-                        {
-                            i: dtype_map[name]
-                            for i, name in enumerate(names)
-                            if i not in dtype_map
-                        }
-                    )
-            else:
-                dtype_map = defaultdict(lambda: None)
-
-            processed_cols = []
-            for col_i, col in enumerate(cols):
-                processed_cols.append(
-                    Series(
-                        col, dtype_map[col_i], try_convert_strings=True  # type: ignore
-                    )
+
+            if verbose:
+                print(stats.report(dtypes))
+            if chunksize is None:
+                yield DataFrame(columns, names=names)
+
+    @staticmethod
+    def _conversion_error(
+        error: "parser.ConversionError",
+        names: Optional[Collection[str]],
+        col_i: int,
+        first_row: int,
+        inferred: bool,
+    ) -> TypeError:
+        name = list(names)[col_i] if names is not None else col_i
+        message = (
+            f"Couldn't convert {error.cell!r} at row {first_row + error.index}"
+            f" of column {name!r} to {error.dtype.__name__}"
+        )
+        if inferred:
+            message += (
+                f", inferred from the first {parser.SAMPLE_ROWS} rows and shared"
+                " by all the chunks. Pass the dtype of the column in 'dtype'."
+            )
+        return TypeError(message)
+
+    @staticmethod
+    def _check_row_sizes(rows: List[List[str]], ncols: int, first_row: int) -> None:
+        for row_i, row in enumerate(rows):
+            if len(row) != ncols:
+                raise ValueError(
+                    f"Invalid number of columns at row {first_row + row_i}"
                 )
 
-            return DataFrame(processed_cols, names=names)
+    @staticmethod
+    def _dtype_map(
+        dtype: Union[type, Dict[Union[int, str], type], None],
+        names: Optional[Collection[str]],
+    ) -> DefaultDict[Union[int, str], Optional[type]]:
+        if isinstance(dtype, type):
+            dtype_map = defaultdict(lambda: dtype)  # type: ignore
+        elif isinstance(dtype, Dict):
+            dtype_map = defaultdict(lambda: None, dtype)
+            if names is not None:
+                dtype_map.update(
+                    {
+                        i: dtype_map[name]
+                        for i, name in enumerate(names)
+                        if i not in dtype_map
+                    }
+                )
+        else:
+            dtype_map = defaultdict(lambda: None)
+        return dtype_map  # type: ignore
+
+    def to_binary(self, filepath: str) -> None:
+        """
+        Writes the DataFrame in the bears columnar binary format, which
+        DataFrame.read_binary loads without parsing.
+        """
+        names = self._id2names if self._names else [None] * len(self)
+        binary.write(
+            filepath,
+            [
+                (name, col.dtype, col._data, col._validity)
+                for name, col in zip(names, self._cols)
+            ],
+            self._nrows,
+        )
+
+    def to_numpy(
+        self,
+        columns: Optional[Sequence[Any]] = None,
+        dtype: Any = None,
+        na_value: Any = None,
+    ) -> Any:
+        """
+        Copies the columns (all of them by default) into a single contiguous
+        2-D numpy array, with one row per row of the DataFrame. Missing
+        values are NaN, or na_value if given. A single column is available
+        without copy as np.asarray(df[name]).
+        """
+        import numpy as np  # type: ignore
+
+        if columns is None:
+            cols = [self._col(i) for i in range(len(self))]
+        else:
+            cols = [self[name] for name in columns]  # type: ignore
+        arrays = [np.asarray(col) for col in cols]
+        if dtype is None:
+            dtype = np.result_type(*arrays) if arrays else float
+        out = np.empty((self._nrows, len(cols)), dtype=dtype)
+        for j, (col, data) in enumerate(zip(cols, arrays)):
+            out[:, j] = data
+            notna = col._notna()
+            if na_value is not None and notna is not None:
+                mask = np.frombuffer(bitmap.to_mask(notna, len(col)), np.bool_)
+                out[~mask, j] = na_value
+        return out
 
     def __getitem__(self, key: Any) -> Union[Series, "DataFrame"]:
         from_cols, index = self._get_index(key)
         if from_cols:
-            cols = [self._cols[i] for i in index]
+            if len(index) == 1:
+                return self._col(index[0])
             if not self._names:
                 names: Optional[List[str]] = None
             else:
                 names = [self._id2names[i] for i in index]
-            if len(cols) == 1:
-                return cols[0]
-            return DataFrame(cols, names)
-        else:
-            index_series = Series._from_data(index, int)
-            cols = [col[index_series] for col in self._cols]
-            return DataFrame(cols, self._id2names if self._names else None)
+            if self._rows is None:
+                cols = [self._columns[i] for i in index]
+                return DataFrame(cols, names)  # type: ignore
+            return DataFrame._view(
+                [self._source[i] for i in index],  # type: ignore
+                self._rows,
+                names,
+                [self._columns[i] for i in index],
+            )
+        if self._rows is not None:
+            # Composes with the selection of this view
+            rows = array("q", map(self._rows.__getitem__, index))
+            return DataFrame._view(
+                self._source, rows, self._names_or_none()  # type: ignore
+            )
+        # A copy of the list of columns, so that replacing a column of this
+        # DataFrame doesn't show through the view
+        source = list(self._columns)
+        return DataFrame._view(
+            source, array("q", index), self._names_or_none()  # type: ignore
+        )
 
     def __invert__(self) -> "DataFrame":
         cols = [col.__invert__() for col in self._cols]
@@ -187,7 +555,7 @@ class DataFrame:
         return DataFrame(cols, names)
 
     def __len__(self) -> int:
-        return len(self._cols)
+        return len(self._columns)
 
     def __repr__(self) -> str:
         out = [
@@ -215,7 +583,55 @@ class DataFrame:
             raise ValueError(f"Expected a Series of size {self._nrows}")
         self._cols[numeric_id] = value.copy()
 
-    def _get_index(self, key: Any) -> Tuple[bool, List[int]]:
+    def _col(self, i: int) -> Series:
+        """Column i, gathered from the parent if this is a view"""
+        col = self._columns[i]
+        if col is None:
+            col = self._source[i][Series._from_data(self._rows, int)]  # type: ignore
+            self._columns[i] = col
+        return col
+
+    @staticmethod
+    def _reread_column(
+        f: TextIO, sep: str, skip: int, col_i: int, nrows: int
+    ) -> List[str]:
+        """
+        The cells of column col_i of the nrows rows after the first skip ones,
+        read again from the file f was opened from.
+        """
+        with open(f.name, mode="r", encoding=f.encoding) as again:
+            rows = islice(csv.reader(again, delimiter=sep), skip, skip + nrows)
+            return [row[col_i] for row in rows]
+
+    def _dtype(self, i: int) -> type:
+        """Dtype of column i, without gathering it"""
+        col = self._columns[i]
+        if col is None:
+            return self._source[i].dtype  # type: ignore
+        return col.dtype
+
+    def _names_or_none(self) -> Optional[List[str]]:
+        return self._id2names if self._names else None
+
+    @staticmethod
+    def _view(
+        source: List[Series],
+        rows: array,
+        names: Optional[List[str]],
+        columns: Optional[List[Optional[Series]]] = None,
+    ) -> "DataFrame":
+        """
+        Creates a DataFrame of the rows of the source columns, gathering them
+        lazily. columns are the ones already gathered, if any.
+        """
+        out = DataFrame([], names)
+        out._columns = [None] * len(source) if columns is None else columns
+        out._source = source
+        out._rows = rows
+        out._nrows = len(rows)
+        return out
+
+    def _get_index(self, key: Any) -> Tuple[bool, Sequence[int]]:
         """
         Returns (from_cols, indices), where if from_cols is True, the indices
         are column indices (row indices otherwise)
@@ -230,7 +646,7 @@ class DataFrame:
             if key.dtype == bool:
                 if len(key) != self._nrows:
                     raise IndexError(f"Expected Series of size {len(self)}")
-                return False, [i for i, value in enumerate(key) if value]
+                return False, key._true_rows()
             if key.dtype == int:
                 return False, key._data
             if key.dtype == str:
@@ -252,8 +668,11 @@ class DataFrame:
         Because using undocumented private API is so much FUN, isn't it,
         matplotlib developers?
         """
-        cols = [i for i in range(len(self)) if self._cols[i].dtype in {int, float}]
+        cols = [i for i in range(len(self)) if self._dtype(i) in {int, float}]
         return self[cols]
 
     def _get_row(self, row_id: int) -> List:
+        if self._rows is not None:
+            row = self._rows[row_id]
+            return [col[row].item() for col in self._source]  # type: ignore
         return [col[row_id].item() for col in self._cols]
@@ -0,0 +1,245 @@
+"""
+Hash-based grouping of DataFrame rows.
+
+Grouping costs one pass over the key column, which assigns a group code to
+every row and the row indices to every group. Aggregations then cost one
+pass over each column they are computed on.
+"""
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from . import aggregation, dataframe
+from .series import Series
+
+
+class GroupBy:
+    """
+    Rows of a DataFrame grouped by the values of one of its columns, in
+    ascending order of key. Rows with a missing key belong to no group.
+    """
+
+    def __init__(
+        self,
+        df: "dataframe.DataFrame",
+        key: str,
+        columns: Optional[Sequence[str]] = None,
+    ):
+        self._df = df
+        self._key = key
+        if columns is None:
+            columns = [name for name in df._id2names if name != key]
+        self._columns = list(columns)
+
+        codes: Dict[Any, int] = {}
+        # Missing keys are None, or NaN in float columns
+        raw_codes = [codes.setdefault(e, len(codes)) for e in df[key]]  # type: ignore
+        # NaN != NaN, so every NaN got its own code
+        self._keys: List[Any] = sorted(k for k in codes if k is not None and k == k)
+        remap = [-1] * len(codes)
+        for new_code, k in enumerate(self._keys):
+            remap[codes[k]] = new_code
+        self._codes = array("q", map(remap.__getitem__, raw_codes))
+
+        indices: List[List[int]] = [[] for _ in self._keys]
+        appends = [group.append for group in indices]
+        for i, code in enumerate(self._codes):
+            if code >= 0:
+                appends[code](i)
+        self._indices = [array("q", group) for group in indices]
+
+    @property
+    def groups(self) -> Dict[Any, Series]:
+        """Row indices of every group"""
+        return {
+            k: Series._from_data(index, int)
+            for k, index in zip(self._keys, self._indices)
+        }
+
+    @property
+    def ngroups(self) -> int:
+        return len(self._keys)
+
+    def agg(self, funcs: Sequence[str]) -> "dataframe.DataFrame":
+        """
+        Returns the key column followed by a "<column> <func>" column for
+        every selected numeric column and function, with one row per group.
+        """
+        cols = [self._key_series()]
+        names = [self._key]
+        for name in self._numeric_columns():
+            stats = self[name].agg(funcs)
+            cols.extend(stats._cols[1:])
+            names.extend(f"{name} {func}" for func in funcs)
+        return dataframe.DataFrame(cols, names)
+
+    def count(self) -> "dataframe.DataFrame":
+        return self._single_statistic("count")
+
+    def get_group(self, key: Any) -> "dataframe.DataFrame":
+        """All the columns of the rows of a group"""
+        index = self._indices[self._keys.index(key)]
+        return self._df[Series._from_data(index, int)]  # type: ignore
+
+    def histogram(
+        self,
+        bins: int = 10,
+        range: Optional[Tuple[float, float]] = None,
+        density: bool = False,
+    ) -> Dict[str, Tuple[List[float], Dict[Any, List[float]]]]:
+        """
+        SeriesGroupBy.histogram of every selected numeric column: one pass
+        over each column, with the group codes computed once for all of them.
+        Returns the bin edges and the counts of every group by column name.
+        """
+        return {
+            name: self[name].histogram(bins, range, density)  # type: ignore
+            for name in self._numeric_columns()
+        }
+
+    def max(self) -> "dataframe.DataFrame":
+        return self._single_statistic("max")
+
+    def mean(self) -> "dataframe.DataFrame":
+        return self._single_statistic("mean")
+
+    def min(self) -> "dataframe.DataFrame":
+        return self._single_statistic("min")
+
+    def percentile(self, rank: float) -> "dataframe.DataFrame":
+        return self._single_statistic(f"{rank * 100}%")
+
+    def std(self) -> "dataframe.DataFrame":
+        return self._single_statistic("std")
+
+    def __getitem__(
+        self, key: Union[str, Sequence[str]]
+    ) -> Union["SeriesGroupBy", "GroupBy"]:
+        if isinstance(key, str):
+            return SeriesGroupBy(self, key)
+        out = GroupBy.__new__(GroupBy)
+        out.__dict__.update(self.__dict__)
+        out._columns = list(key)
+        return out
+
+    def __iter__(self) -> Iterator[Tuple[Any, "dataframe.DataFrame"]]:
+        for k in self._keys:
+            yield k, self.get_group(k)
+
+    def __len__(self) -> int:
+        return self.ngroups
+
+    def _gather(self, name: str) -> List[Series]:
+        """A column in every group"""
+        col = self._df[name]
+        return [col[Series._from_data(index, int)] for index in self._indices]
+
+    def _key_series(self) -> Series:
+        return Series._from_data(
+            Series._buffer(self._keys, self._df[self._key].dtype),  # type: ignore
+            self._df[self._key].dtype,  # type: ignore
+        )
+
+    def _numeric_columns(self) -> List[str]:
+        """Selected columns statistics are computed on"""
+        return [
+            name
+            for name in self._columns
+            if self._df[name].dtype in {bool, int, float}  # type: ignore
+        ]
+
+    def _single_statistic(self, func: str) -> "dataframe.DataFrame":
+        names = self._numeric_columns()
+        cols = [self._key_series()]
+        for name in names:
+            cols.append(self[name].agg([func])._cols[1])  # type: ignore
+        return dataframe.DataFrame(cols, [self._key, *names])
+
+
+class SeriesGroupBy:
+    """
+    One column of a GroupBy.
+    """
+
+    def __init__(self, groupby: GroupBy, name: str):
+        self._groupby = groupby
+        self._name = name
+
+    def agg(self, funcs: Sequence[str]) -> "dataframe.DataFrame":
+        """
+        Returns the key column followed by one column per function, with one
+        row per group.
+        """
+        parsed = [aggregation.parse_func(func) for func in funcs]
+        col = self._groupby._df[self._name]
+        if col.dtype not in {bool, int, float}:  # type: ignore
+            raise ValueError(f"Not defined for Series of dtype {col.dtype}")
+        results = [
+            aggregation.aggregate(group._valid_data(), parsed)
+            for group in self._groupby._gather(self._name)
+        ]
+        cols = [self._groupby._key_series()]
+        for func_i in range(len(funcs)):
+            cols.append(
+                Series._from_data(
+                    array("d", [values[func_i] for values in results]), float
+                )
+            )
+        return dataframe.DataFrame(cols, [self._groupby._key, *funcs])
+
+    def count(self) -> "dataframe.DataFrame":
+        return self._rename(self.agg(["count"]))
+
+    def histogram(
+        self,
+        bins: int = 10,
+        range: Optional[Tuple[float, float]] = None,
+        density: bool = False,
+    ) -> Tuple[List[float], Dict[Any, List[float]]]:
+        """
+        Counts the values of every group in bins shared by all groups, in
+        one pass over the column. Returns the bin edges and the counts (or
+        densities) of every group.
+
+        Args:
+            bins: the number of equal-width bins
+            range: the lower and upper edges, the cached min and max of the
+                column by default
+            density: whether to normalize counts so that every group
+                integrates to 1
+        """
+        col = self._groupby._df[self._name]
+        if range is None:
+            range = (col.min(), col.max())  # type: ignore
+        edges, counts = aggregation.histogram(
+            col._data,  # type: ignore
+            bins,
+            range,
+            col._histogram_codes(self._groupby._codes),  # type: ignore
+            self._groupby.ngroups,
+            density,
+        )
+        return edges, dict(zip(self._groupby._keys, counts))
+
+    def max(self) -> "dataframe.DataFrame":
+        return self._rename(self.agg(["max"]))
+
+    def mean(self) -> "dataframe.DataFrame":
+        return self._rename(self.agg(["mean"]))
+
+    def min(self) -> "dataframe.DataFrame":
+        return self._rename(self.agg(["min"]))
+
+    def percentile(self, rank: float) -> "dataframe.DataFrame":
+        return self._rename(self.agg([f"{rank * 100}%"]))
+
+    def std(self) -> "dataframe.DataFrame":
+        return self._rename(self.agg(["std"]))
+
+    def __iter__(self) -> Iterator[Tuple[Any, Series]]:
+        return zip(self._groupby._keys, self._groupby._gather(self._name))
+
+    def __len__(self) -> int:
+        return self._groupby.ngroups
+
+    def _rename(self, df: "dataframe.DataFrame") -> "dataframe.DataFrame":
+        return dataframe.DataFrame(df._cols, [self._groupby._key, self._name])
@@ -0,0 +1,222 @@
+"""
+Column-at-a-time kernels used by Series operators.
+
+Each kernel maps a C-level operator over whole buffers (broadcasting scalars
+with itertools.repeat) and packs the result straight into the typed buffer
+of the result dtype, which is looked up in a table instead of being guessed
+from the first element of the result.
+
+When numpy is installed, the arithmetic, comparison and bitwise operators
+on typed buffers run as ufuncs instead, over views of the buffers and into
+a preallocated typed array. They only do so when the result is the one
+Python would give: ints that would overflow 64 bits, divisions by zero and
+ints that don't convert exactly to float go the pure Python way.
+"""
+from array import array
+from itertools import product, repeat
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Typed arrays, typed memoryviews (of memory-mapped files) or plain lists
+Buffer = Union[array, memoryview, List[Any]]
+
+_NUMERIC = (bool, int, float)
+_ARITHMETIC = (
+    operator.add,
+    operator.sub,
+    operator.mul,
+    operator.floordiv,
+    operator.mod,
+    operator.pow,
+)
+_COMPARISONS = (operator.lt, operator.le, operator.gt, operator.ge)
+_BITWISE = (operator.and_, operator.or_, operator.xor)
+_EQUALITIES = (*_COMPARISONS, operator.eq, operator.ne)
+# Numeric and boolean columns live in contiguous typed buffers, strings
+# (and ints too big for 64 bits) stay in plain lists
+TYPECODES: Dict[type, str] = {bool: "B", float: "d", int: "q"}
+
+#  (operator, lhs dtype, rhs dtype) -> result dtype
+_RESULT_DTYPES: Dict[Tuple[Callable, type, type], type] = {}
+
+for _lhs, _rhs in product(_NUMERIC, repeat=2):
+    _promoted = float if float in (_lhs, _rhs) else int
+    for _op in _ARITHMETIC:
+        _RESULT_DTYPES[(_op, _lhs, _rhs)] = _promoted
+    _RESULT_DTYPES[(operator.truediv, _lhs, _rhs)] = float
+    for _op in _COMPARISONS:
+        _RESULT_DTYPES[(_op, _lhs, _rhs)] = bool
+    if float not in (_lhs, _rhs):
+        for _op in _BITWISE:
+            _RESULT_DTYPES[(_op, _lhs, _rhs)] = bool if _lhs == _rhs == bool else int
+for _lhs, _rhs in product((*_NUMERIC, str), repeat=2):
+    _RESULT_DTYPES[(operator.eq, _lhs, _rhs)] = bool
+    _RESULT_DTYPES[(operator.ne, _lhs, _rhs)] = bool
+for _op in _COMPARISONS:
+    _RESULT_DTYPES[(_op, str, str)] = bool
+_RESULT_DTYPES[(operator.add, str, str)] = str
+_RESULT_DTYPES[(operator.mul, str, int)] = str
+_RESULT_DTYPES[(operator.mul, int, str)] = str
+# int ** int is a float as soon as an exponent is negative
+for _lhs, _rhs in product((bool, int), repeat=2):
+    del _RESULT_DTYPES[(operator.pow, _lhs, _rhs)]
+
+# operator -> name of the numpy ufunc with the same result
+_UFUNCS: Dict[Callable, str] = {
+    operator.add: "add",
+    operator.sub: "subtract",
+    operator.mul: "multiply",
+    operator.truediv: "true_divide",
+    operator.lt: "less",
+    operator.le: "less_equal",
+    operator.gt: "greater",
+    operator.ge: "greater_equal",
+    operator.eq: "equal",
+    operator.ne: "not_equal",
+    operator.and_: "bitwise_and",
+    operator.or_: "bitwise_or",
+    operator.xor: "bitwise_xor",
+}
+# Largest int magnitude that converts to float exactly
+_EXACT_FLOAT = 2**53
+
+
+def result_dtype(op: Callable, lhs: type, rhs: type) -> Optional[type]:
+    """
+    Returns the dtype of `lhs op rhs`, None if it depends on the values.
+    """
+    return _RESULT_DTYPES.get((op, lhs, rhs))
+
+
+def binary_op(
+    op: Callable[[Any, Any], Any],
+    lhs: Buffer,
+    lhs_dtype: type,
+    rhs: Any,
+    rhs_dtype: type,
+    scalar: bool = False,
+) -> Tuple[Buffer, type]:
+    """
+    Applies op element-wise to two buffers of the same size, or to a buffer
+    and a scalar if scalar is True.
+    """
+    dtype = result_dtype(op, lhs_dtype, rhs_dtype)
+    out = _ufunc(op, lhs, lhs_dtype, rhs, rhs_dtype, scalar, dtype)
+    if out is not None:
+        return out, dtype  # type: ignore
+    if scalar:
+        return _pack(map(op, lhs, repeat(rhs, len(lhs))), dtype)
+    return _pack(map(op, lhs, rhs), dtype)
+
+
+def unary_op(
+    op: Callable[[Any], Any], data: Buffer, dtype: type
+) -> Tuple[Buffer, type]:
+    """
+    Applies op element-wise, ~ on booleans being the logical not.
+    """
+    if op == operator.invert and dtype == bool:
+        return _pack(map(operator.not_, data), bool)
+    return _pack(map(op, data), dtype if dtype in _NUMERIC else None)
+
+
+def to_owned(data: Buffer) -> Union[array, List[Any]]:
+    """
+    Returns a growable copy of data.
+    """
+    if isinstance(data, memoryview):
+        if not data.c_contiguous:
+            return array(data.format, data.tolist())
+        out = array(data.format)
+        out.frombytes(data.cast("B"))
+        return out
+    return data[:]
+
+
+def _ufunc(
+    op: Callable,
+    lhs: Buffer,
+    lhs_dtype: type,
+    rhs: Any,
+    rhs_dtype: type,
+    scalar: bool,
+    dtype: Optional[type],
+) -> Optional[array]:
+    """
+    lhs op rhs computed by numpy into a new typed array, None when numpy
+    isn't installed or wouldn't give the result Python gives.
+    """
+    name = _UFUNCS.get(op)
+    if name is None or dtype not in TYPECODES or not len(lhs):
+        return None
+    for data in (lhs,) if scalar else (lhs, rhs):
+        if isinstance(data, list) or not memoryview(data).c_contiguous:
+            return None
+    if scalar and rhs_dtype == int and not -(2**63) <= rhs < 2**63:
+        return None
+    if op in _EQUALITIES and {lhs_dtype, rhs_dtype} == {int, float}:
+        # Python compares ints to floats exactly, numpy converts the int
+        return None
+    try:
+        import numpy as np  # type: ignore
+    except ImportError:
+        return None
+
+    def operand(data: Any, data_dtype: type) -> Any:
+        if scalar and data is rhs:
+            return int(data) if data_dtype == bool else data
+        values = np.frombuffer(data, TYPECODES[data_dtype])
+        if data_dtype == bool and dtype != bool:
+            # Python adds booleans as ints, numpy as a logical or
+            return values.astype(np.int64)
+        return values
+
+    a, b = operand(lhs, lhs_dtype), operand(rhs, rhs_dtype)
+    if op == operator.truediv:
+        if np.any(b == 0):
+            return None  # ZeroDivisionError
+        for x, x_dtype in ((a, lhs_dtype), (b, rhs_dtype)):
+            if x_dtype != float and np.any(np.abs(x) > _EXACT_FLOAT):
+                return None  # Python divides big ints exactly
+    elif op == operator.mul and dtype == int:
+        if np.any(np.abs(np.multiply(a, b, dtype=np.float64)) >= 2.0**62):
+            return None  # Might overflow
+    typecode = TYPECODES[dtype]
+    out = array(typecode, [0]) * len(lhs)
+    result = np.frombuffer(out, typecode)
+    with np.errstate(all="ignore"):
+        getattr(np, name)(a, b, out=result)
+    if op in (operator.add, operator.sub) and dtype == int:
+        # Overflowed where the sign of the result is wrong
+        wrong = (result ^ a) & (result ^ (b if op == operator.add else ~b))
+        if np.any(wrong < 0):
+            return None
+    # Released so that the array can grow again
+    del result
+    return out
+
+
+def _pack(values: Iterable, dtype: Optional[type]) -> Tuple[Buffer, type]:
+    """
+    Consumes values into the buffer type of dtype, falling back to a list
+    when the values don't fit in it. A None dtype is deduced from the first
+    value, like Series does.
+    """
+    if dtype == bool:
+        # bytes() packs an iterator of booleans much faster than array() does
+        return array(TYPECODES[bool], bytes(values)), bool
+    data = list(values)
+    if dtype is None:
+        dtype = float if not data else type(data[0])
+    typecode = TYPECODES.get(dtype)
+    if typecode is not None:
+        try:
+            return array(typecode, data), dtype
+        except OverflowError:
+            pass
+        except TypeError:
+            # int ** negative int
+            if dtype != int:
+                raise
+            return array(TYPECODES[float], data), float
+    return data, dtype
@@ -0,0 +1,181 @@
+"""
+Typed conversion of csv columns.
+
+Dtypes are inferred once from a sample of rows, then every block of rows is
+transposed and converted column by column straight into the typed buffer of
+the column, empty cells becoming missing values (cleared bits of the validity
+bitmap) without going through an exception. A cell the inferred dtype can't
+hold raises ConversionError, after which the column is widened (see widen).
+"""
+from array import array
+from time import perf_counter
+from typing import Any, List, Sequence, Tuple
+
+from . import bitmap
+from .bitmap import Bitmap
+from .kernels import TYPECODES, Buffer
+
+# Number of rows the schema is inferred from
+SAMPLE_ROWS = 1000
+# Number of rows converted at once, which bounds the raw strings held in memory
+BLOCK_ROWS = 1 << 14
+
+_NAN = float("NaN")
+# Inferred dtypes, from the narrowest
+_WIDENING = (int, float, str)
+
+
+class ConversionError(TypeError):
+    """
+    A cell couldn't be converted to the dtype of its column.
+    """
+
+    def __init__(self, cell: str, dtype: type, index: int):
+        super().__init__(f"Couldn't convert {cell!r} to {dtype}.")
+        self.cell = cell
+        self.dtype = dtype
+        # Position of the cell among the converted ones
+        self.index = index
+
+
+def infer_dtype(cells: Sequence[str]) -> type:
+    """
+    Returns the narrowest of int, float and str that all the non-empty cells
+    can be converted to, float if they are all empty.
+    """
+    filled = [cell for cell in cells if cell]
+    if not filled:
+        return float
+    for dtype in (int, float):
+        try:
+            for cell in filled:
+                dtype(cell)
+        except ValueError:
+            continue
+        return dtype
+    return str
+
+
+def widen(dtype: type, cells: Sequence[str]) -> type:
+    """
+    The narrowest inferred dtype holding both dtype and all the cells.
+    """
+    return max(dtype, infer_dtype(cells), key=_WIDENING.index)
+
+
+def convert(
+    cells: Sequence[str], dtype: type, strict: bool = False
+) -> Tuple[Buffer, Bitmap]:
+    """
+    Converts cells to a buffer of dtype and its validity bitmap. Empty cells
+    are missing, and so are unparsable floats, like they are in Series, unless
+    strict is set: they raise ConversionError then, like unparsable ints.
+    """
+    if dtype == float:
+        data = _convert_float(cells, strict)
+        return data, bitmap.from_mask(map(float.__eq__, data, data), len(data))
+    filled = bitmap.from_mask(map(bool, cells), len(cells))
+    if dtype == str:
+        return list(cells), filled
+    if dtype == int:
+        try:
+            values = list(map(int, cells) if filled is None else _ints_or_zero(cells))
+        except ValueError:
+            index, cell = next(
+                (i, cell) for i, cell in enumerate(cells) if cell and not _is_int(cell)
+            )
+            raise ConversionError(cell, dtype, index) from None
+        try:
+            return array(TYPECODES[int], values), filled
+        except OverflowError:
+            return values, filled
+    from .series import Series
+
+    series = Series([cell or None for cell in cells], dtype, try_convert_strings=True)
+    return series._data, series._validity
+
+
+class ParseStats:
+    """
+    Per-column conversion counters of a csv parse.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        self.cells = [0 for _ in self.names]
+        self.seconds = [0.0 for _ in self.names]
+        self.start = perf_counter()
+
+    def convert(
+        self, col_i: int, cells: Sequence[str], dtype: type, strict: bool = False
+    ) -> Tuple[Buffer, Bitmap]:
+        start = perf_counter()
+        out = convert(cells, dtype, strict)
+        self.seconds[col_i] += perf_counter() - start
+        self.cells[col_i] += len(cells)
+        return out
+
+    def report(self, dtypes: Sequence[type]) -> str:
+        total = perf_counter() - self.start
+        lines = [f"Parsed {max(self.cells, default=0)} rows in {total:.3f}s"]
+        for name, dtype, cells, seconds in zip(
+            self.names, dtypes, self.cells, self.seconds
+        ):
+            rate = cells / seconds if seconds else float("inf")
+            lines.append(
+                f"  {name}: {dtype.__name__}, {seconds:.4f}s, {rate:,.0f} cells/s"
+            )
+        return "\n".join(lines)
+
+
+def transpose(rows: List[List[str]], ncols: int) -> List[Tuple[str, ...]]:
+    if not rows:
+        return [() for _ in range(ncols)]
+    return list(zip(*rows))
+
+
+def _convert_float(cells: Sequence[str], strict: bool = False) -> array:
+    try:
+        return array(TYPECODES[float], list(map(float, cells)))
+    except ValueError:
+        pass
+    try:
+        return array(
+            TYPECODES[float], [float(cell) if cell else _NAN for cell in cells]
+        )
+    except ValueError:
+        if strict:
+            index, cell = next(
+                (i, cell)
+                for i, cell in enumerate(cells)
+                if cell and not _is_float(cell)
+            )
+            raise ConversionError(cell, float, index) from None
+        return array(TYPECODES[float], list(map(_to_float, cells)))
+
+
+def _ints_or_zero(cells: Sequence[str]) -> List[int]:
+    return [int(cell) if cell else 0 for cell in cells]
+
+
+def _is_float(cell: str) -> bool:
+    try:
+        float(cell)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_int(cell: str) -> bool:
+    try:
+        int(cell)
+    except ValueError:
+        return False
+    return True
+
+
+def _to_float(cell: Any) -> float:
+    try:
+        return float(cell)
+    except ValueError:
+        return _NAN
@@ -1,3 +1,5 @@
+from array import array
+from itertools import chain, compress, repeat
 import operator
 from typing import (
     Any,
@@ -8,15 +10,27 @@ from typing import (
     List,
     Mapping,
     Optional,
+    Sequence,
     Tuple,
     Union,
 )
 
-from .i_hate_42 import max_, min_
+from . import aggregation, bitmap, kernels
+from .bitmap import Bitmap
+from .kernels import Buffer
 
 
 class Series(Collection):
+    """
+    Missing values are tracked by a validity bitmap (see bears.bitmap), the
+    data of a missing row holding the fill value of the dtype. NaN floats
+    count as missing too.
+    """
+
     _default_values: Dict[type, Any] = {float: float("NaN")}
+    _fill_values: Dict[type, Any] = {bool: False, float: float("NaN"), int: 0, str: ""}
+    _typecodes: Dict[type, str] = kernels.TYPECODES
+    _division_ops = {operator.floordiv, operator.mod, operator.truediv}
 
     def __init__(
         self,
@@ -28,21 +42,38 @@ class Series(Collection):
         """
         Create a new Series object with the data and dtype provided.
         If dtype is not provided, it is deduced to be the type of the first
-        element of the data. Default dtype is float.
+        element of the data. Default dtype is float. None elements are
+        missing values.
         """
         self._use_default_values = use_default_values
+        # Order statistics, dropped whenever the data is modified in place
+        self._cache: Dict[str, Any] = {}
 
-        self._data: List[Any] = []
         self._dtype: type = float if dtype is None else dtype
 
+        missing: List[int] = []
         if data is not None:
-            self._data, self._dtype = self._convert_dtype_iter(
+            converted, self._dtype, missing = self._convert_dtype_iter(
                 data, dtype, try_convert_strings
             )
 
         if self._dtype not in {bool, float, int, str}:
             raise NotImplementedError(f"Unsupported dtype: {self._dtype}")
 
+        self._data: Buffer = Series._buffer(
+            converted if data is not None else (), self._dtype
+        )
+        self._validity: Bitmap = None
+        if self._dtype == float:
+            self._validity = bitmap.from_mask(
+                map(operator.eq, self._data, self._data), len(self._data)
+            )
+        elif missing:
+            mask = bytearray(b"\x01") * len(self._data)
+            for i in missing:
+                mask[i] = 0
+            self._validity = bitmap.from_mask(mask, len(mask))
+
     #
     #  Properties =============================================================
     #
@@ -64,37 +95,108 @@ class Series(Collection):
     #
 
     def copy(self) -> "Series":
-        return Series._from_data(self._data.copy(), self._dtype)
+        return Series._from_data(
+            kernels.to_owned(self._data), self._dtype, self._validity
+        )
 
     def item(self) -> Any:
-        """Returns the only item as a python object"""
+        """Returns the only item as a python object, None if it is missing"""
         if len(self) != 1:
             raise ValueError("item() can only be used with Series of length 1")
+        if self._validity == 0 and self._dtype != float:
+            return None
+        if self._dtype == bool:
+            return bool(self._data[0])
         return self._data[0]
 
     def dropna(self) -> "Series":
         """
-        Returns a new Series with NaN values dropped.
-        If the dtype is not float, returns self.
+        Returns a new Series with missing values dropped.
+        If there are none, returns self.
         """
-        if self._dtype == float:
-            return self[self == self]
-        return self
+        notna = self._notna()
+        if notna is None:
+            return self
+        index = array("q", compress(range(len(self)), bitmap.to_mask(notna, len(self))))
+        return self[Series._from_data(index, int)]
+
+    def histogram(
+        self,
+        bins: int = 10,
+        range: Optional[Tuple[float, float]] = None,
+        density: bool = False,
+    ) -> Tuple[List[float], List[float]]:
+        """
+        Counts the non-missing values in equal-width bins, in one pass.
+        Returns the bin edges and the counts (or densities).
+
+        Args:
+            bins: the number of bins
+            range: the lower and upper edges, the cached min and max by
+                default
+            density: whether to normalize counts so that they integrate to 1
+        """
+        if self._dtype not in {bool, int, float}:
+            raise ValueError(f"Not defined for Series of dtype {self._dtype}")
+        if range is None:
+            range = (self.min(), self.max())
+        edges, counts = aggregation.histogram(
+            self._data,
+            bins,
+            range,
+            self._histogram_codes(),
+            density=density,
+        )
+        return edges, counts[0]
+
+    def isna(self) -> "Series":
+        """Boolean Series, True where values are missing"""
+        mask = bitmap.to_mask(self._notna(), len(self))
+        return Series._from_data(array("B", map(operator.not_, mask)), bool)
+
+    def kde(
+        self, points: int = 256, bandwidth: Optional[float] = None
+    ) -> Tuple[List[float], List[float]]:
+        """
+        Binned Gaussian kernel density estimate of the non-missing values,
+        see aggregation.kde. Returns the positions, spanning the cached min
+        and max widened by 4 bandwidths as the kernel is, and the densities.
+
+        Args:
+            points: the number of positions
+            bandwidth: standard deviation of the kernel, Scott's rule by
+                default
+        """
+        if self._dtype not in {bool, int, float}:
+            raise ValueError(f"Not defined for Series of dtype {self._dtype}")
+        count, _, m2, min_, max_ = self._moments()
+        if not count:
+            raise ValueError("Not defined for empty Series")
+        if bandwidth is None:
+            std = (m2 / (count - 1)) ** 0.5 if count > 1 else 0.0
+            bandwidth = std * count**-0.2 or 1.0
+        return aggregation.kde(
+            self._valid_data(),
+            bandwidth,
+            (min_ - 4 * bandwidth, max_ + 4 * bandwidth),
+            points,
+        )
 
     def max(self, **kwargs) -> Any:
         """kwargs to keep compatibility with pandas"""
-        return max_(self._data)
+        return self._extremum(largest=True)
 
     def mean(self) -> Any:
         if self._dtype not in {int, float}:
             raise ValueError(f"Not defined for Series of dtype {self._dtype}")
-        if not len(self):
+        count, mean, _, _, _ = self._moments()
+        if not count:
             raise ValueError("Not defined for empty Series")
-        return sum(self._data) / len(self)
+        return mean
 
     def min(self, **kwargs) -> Any:
         """kwargs to keep compatibility with pandas"""
-        return min_(self._data)
+        return self._extremum(largest=False)
 
     def map(
         self, arg: Union[Callable, Mapping, "Series"], na_action: Optional[str] = None
@@ -108,80 +210,191 @@ class Series(Collection):
         if na_action is not None:
             if na_action not in {"ignore"}:
                 raise ValueError(f"Invalid value of na_action={na_action}")
-            skipna = self._dtype == float
+            skipna = self._notna() is not None
         if isinstance(arg, Series):
             if len(arg) != len(self):
                 raise ValueError(f"Size mismatch, got {len(arg)}, {len(self)}")
-            return arg.copy() if not skipna else arg[self == self]
+            return arg.copy() if not skipna else arg[~self.isna()]
+        values = self._valid_data() if skipna else self
         if callable(arg):
-            return Series(
-                [arg(elem) for elem in self._data if not skipna or elem == elem]
-            )
+            return Series([arg(elem) for elem in values])
         if isinstance(arg, Mapping):
-            return Series(
-                [arg[elem] for elem in self._data if not skipna or elem == elem]
-            )
+            return Series([arg[elem] for elem in values])
         raise ValueError(f"Cannot map with {type(arg)}")
 
     def percentile(self, rank: float) -> Any:
-        if not len(self):
-            raise ValueError("Not defined for empty Series")
+        """Missing values are ignored, like in every statistic"""
         if not 0 < rank < 1:
             raise ValueError("Rank must be in range [0, 1]")
-        sorted_self = self.sort()
-        return sorted_self[int(rank * len(sorted_self))].item()
+        sorted_data = self._sorted()
+        if not len(sorted_data):
+            raise ValueError("Not defined for empty Series")
+        value = sorted_data[int(rank * len(sorted_data))]
+        return bool(value) if self._dtype == bool else value
 
     def sort(self, in_place: bool = False) -> "Series":
+        """Missing values are put last"""
+        data = kernels.to_owned(self._sorted())
+        nvalid = len(data)
+        validity = None
+        if nvalid < len(self):
+            data.extend([Series._fill_values[self._dtype]] * (len(self) - nvalid))
+            validity = (1 << nvalid) - 1
         if in_place:
-            self._data.sort()
+            self._data = data
+            self._validity = validity
+            self._cache.clear()
             return self
-        return Series._from_data(sorted(self._data), self._dtype)
+        return Series._from_data(data, self._dtype, validity)
 
     def std(self) -> Any:
-        mean = self.mean()
-        return (sum((e - mean) ** 2 for e in self) / len(self)) ** 0.5
+        count, _, m2, _, _ = self._moments()
+        if not count:
+            raise ValueError("Not defined for empty Series")
+        return (m2 / count) ** 0.5
 
     #
     #  Magic methods (except operators) =======================================
     #
 
+    def __array__(self, dtype: Any = None, copy: Optional[bool] = None) -> Any:
+        """
+        numpy interoperability (numpy is only imported when called). Numeric and
+        boolean data is handed out as a read-only view of the buffer, without
+        copy. Missing values of int and bool Series are NaN in a float copy.
+        As NumPy 2 asks, copy=True always returns a writable copy and
+        copy=False raises ValueError when a copy can't be avoided.
+        """
+        import numpy as np  # type: ignore
+
+        no_copy = ValueError("Unable to avoid copy while creating an array")
+        if isinstance(self._data, list):
+            if copy is False:
+                raise no_copy
+            values = self._data if self._validity is None else list(self)
+            return np.array(values, dtype=dtype)
+        if not len(self._data):
+            out = np.empty(0, Series._typecodes[self._dtype])
+        else:
+            out = np.frombuffer(self._data, Series._typecodes[self._dtype])
+        if self._dtype == bool:
+            out = out.view(np.bool_)
+        if self._validity is not None and self._dtype != float:
+            if copy is False:
+                raise no_copy
+            out = out.astype(float)
+            mask = bitmap.to_mask(self._validity, len(self))
+            out[np.frombuffer(mask, np.bool_) == 0] = np.nan
+        elif copy:
+            out = out.copy()
+        else:
+            out.flags.writeable = False
+        if dtype is None or out.dtype == np.dtype(dtype):
+            return out
+        if copy is False:
+            raise no_copy
+        return out.astype(dtype)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        """Buffer protocol (Python 3.12+), read-only, without missing values"""
+        if isinstance(self._data, list):
+            raise BufferError(f"Series of dtype {self._dtype} have no buffer")
+        return memoryview(self._data).toreadonly()
+
     def __contains__(self, value: Any) -> bool:
         return value in self._data
 
     def __getitem__(self, key: Union[int, slice, "Series"]) -> Any:
+        if isinstance(key, slice):
+            return Series._from_data(
+                kernels.to_owned(self._data[key]),
+                self._dtype,
+                bitmap.slice_(self._validity, len(self), key),
+            )
+        if isinstance(key, int):
+            # Indexed first, which raises the IndexError out of range
+            value = self._data[key]
+            # Single bit test instead of a mask of the whole bitmap
+            valid = bitmap.get(self._validity, len(self), key)
+            return Series._from_data(
+                Series._buffer([value], self._dtype),
+                self._dtype,
+                None if valid else 0,
+            )
         index = self._get_index(key)
-        data = [self._data[i] for i in index]
-        return Series._from_data(data, self._dtype)
+        if not isinstance(self._data, list):
+            data: Buffer = array(
+                Series._typecodes[self._dtype], map(self._data.__getitem__, index)
+            )
+        else:
+            data = [self._data[i] for i in index]
+        validity = bitmap.take(self._validity, len(self), index)
+        return Series._from_data(data, self._dtype, validity)
 
     def __iter__(self):
-        return iter(self._data)
+        """Missing values are NaN in float Series, None otherwise"""
+        values = map(bool, self._data) if self._dtype == bool else iter(self._data)
+        if self._validity is None or self._dtype == float:
+            return values
+        mask = bitmap.to_mask(self._validity, len(self))
+        return (value if valid else None for value, valid in zip(values, mask))
 
     def __len__(self) -> int:
         return len(self._data)
 
     def __repr__(self) -> str:
-        return f"bears.Series, len={len(self)}, dtype={self._dtype}:" f"\n{self._data}"
+        return f"bears.Series, len={len(self)}, dtype={self._dtype}:" f"\n{list(self)}"
 
     def __setitem__(self, key: Union[int, slice, "Series"], value: Any) -> None:
         index = self._get_index(key)
+        self._cache.clear()
 
         if isinstance(value, Iterable) and not isinstance(value, str):
-            data, _ = self._convert_dtype_iter(value, self._dtype)
+            data, _, missing = self._convert_dtype_iter(value, self._dtype)
             if len(data) != len(index):
                 raise ValueError(
                     f"Expected exactly {len(self)} elements," f" received {len(data)}"
                 )
-            for i, v in zip(index, data):
-                self._data[i] = v
+            self._put(index, data)
+            missing_rows = [index[i] for i in missing]  # type: ignore
 
         else:
-            if not isinstance(value, self._dtype):
+            missing_rows = []
+            if value is None:
+                value = Series._fill_values[self._dtype]
+                missing_rows = list(index)
+            elif not isinstance(value, self._dtype):
                 value = self._convert_dtype(value, self._dtype)
+            self._put(index, repeat(value, len(index)))
+
+        if isinstance(key, int):
+            self._validity = bitmap.set_(
+                self._validity, len(self), key, not missing_rows
+            )
+        elif self._validity is not None or missing_rows:
+            mask = bytearray(bitmap.to_mask(self._validity, len(self)))
             for i in index:
-                self._data[i] = value
+                mask[i] = 1
+            for i in missing_rows:
+                mask[i] = 0
+            self._validity = bitmap.from_mask(mask, len(mask))
+
+    def _put(self, index: Sequence[int], values: Iterable[Any]) -> None:
+        """
+        Writes values at index, moving the data to a list when an int
+        doesn't fit in 64 bits, as the constructor does.
+        """
+        values = list(values)
+        try:
+            for i, v in zip(index, values):
+                self._data[i] = v
+        except OverflowError:
+            self._data = list(self._data)
+            for i, v in zip(index, values):
+                self._data[i] = v
 
     def __str__(self) -> str:
-        return f"{self._data}"
+        return f"{list(self)}"
 
     #
     #  Operators ==============================================================
@@ -214,7 +427,8 @@ class Series(Collection):
         return self.item()
 
     def __invert__(self) -> "Series":
-        return Series((e.__invert__() for e in self._data), self._dtype)
+        data, dtype = kernels.unary_op(operator.invert, self._data, self._dtype)
+        return Series._from_data(data, dtype, self._validity)
 
     def __le__(self, other: Any) -> "Series":
         return self._binary_op(other, operator.le)
@@ -257,19 +471,75 @@ class Series(Collection):
         if isinstance(other, Series):
             if len(self) != len(other):
                 raise ValueError(f"Size mismatch: {len(self)} vs {len(other)}")
-            data = [operator(lhs, rhs) for lhs, rhs in zip(self, other)]
+            rhs = other._data
+            if other._validity is not None and other._dtype != float:
+                # Missing divisors would raise with their fill value
+                if operator in Series._division_ops:
+                    mask = bitmap.to_mask(other._validity, len(other))
+                    rhs = [v if valid else 1 for v, valid in zip(rhs, mask)]
+            data, dtype = kernels.binary_op(
+                operator, self._data, self._dtype, rhs, other._dtype
+            )
+            validity = bitmap.and_(self._validity, other._validity)
         else:
-            data = [operator(lhs, other) for lhs in self]
-        return Series._from_data(data, Series._deduce_dtype(data))
+            data, dtype = kernels.binary_op(
+                operator, self._data, self._dtype, other, type(other), scalar=True
+            )
+            validity = self._validity
+        return Series._from_data(data, dtype, validity)
+
+    def _extremum(self, largest: bool) -> Any:
+        if self._dtype in {int, float} and "sorted" not in self._cache:
+            count, _, _, min_, max_ = self._moments()
+            if not count:
+                raise ValueError("Not defined for empty Series")
+            return max_ if largest else min_
+        sorted_data = self._sorted()
+        if not len(sorted_data):
+            raise ValueError("Not defined for empty Series")
+        value = sorted_data[-1 if largest else 0]
+        return bool(value) if self._dtype == bool else value
+
+    def _extend(self, other: "Series") -> None:
+        """
+        Appends other in place, moving memory-mapped data to memory first.
+        """
+        if isinstance(self._data, memoryview):
+            self._data = kernels.to_owned(self._data)
+        data = self._data
+        n = len(data)
+        try:
+            data.extend(other._data)  # type: ignore
+        except BufferError:
+            # numpy holds a view of the array, which can't be resized then:
+            # the view keeps the old array and the Series moves to a new one
+            data = Series._buffer(chain(data, other._data), self._dtype)
+        except OverflowError:
+            # array.extend keeps the items before the one that overflowed
+            del data[n:]  # type: ignore
+            data = [*data, *other._data]
+        # Only once the data is extended, so that a failure leaves self as is
+        self._data = data
+        self._cache.clear()
+        self._validity = bitmap.concat(self._validity, n, other._validity, len(other))
 
     def _convert_dtype_iter(
         self,
         data: Iterable,
         dtype: Optional[type] = None,
         try_convert_strings: bool = False,
-    ) -> Tuple[List, type]:
-        out = []
+    ) -> Tuple[List, type, List[int]]:
+        """
+        Returns the converted elements, their dtype and the positions of the
+        None elements, which hold the fill value of the dtype.
+        """
+        out: List[Any] = []
+        missing: List[int] = []
         for elem in data:
+            if elem is None:
+                missing.append(len(out))
+                out.append(None)
+                continue
             if dtype is None:
                 dtype = type(elem)
                 if dtype == str and try_convert_strings:
@@ -280,7 +550,9 @@ class Series(Collection):
                 out.append(self._convert_dtype(elem, dtype))
         if dtype is None:
             dtype = float
-        return out, dtype
+        for i in missing:
+            out[i] = Series._fill_values.get(dtype)
+        return out, dtype, missing
 
     def _convert_dtype(self, item: Any, dtype: type) -> Any:
         try:
@@ -291,6 +563,22 @@ class Series(Collection):
             else:
                 raise TypeError(f"Couldn't convert {item} to {dtype}.")
 
+    @staticmethod
+    def _buffer(data: Iterable, dtype: type) -> Buffer:
+        """
+        Packs data into the storage used for dtype: a typed array for numeric
+        and boolean columns, a list otherwise.
+        """
+        if not isinstance(data, Collection):
+            data = list(data)
+        typecode = Series._typecodes.get(dtype)
+        if typecode is not None:
+            try:
+                return array(typecode, data)
+            except OverflowError:
+                pass
+        return data if isinstance(data, list) else list(data)
+
     @staticmethod
     def _deduce_dtype(data: Iterable) -> type:
         if not data:
@@ -298,12 +586,13 @@ class Series(Collection):
         return type(next(iter(data)))
 
     @staticmethod
-    def _from_data(data: List, dtype: type) -> "Series":
+    def _from_data(data: Buffer, dtype: type, validity: Bitmap = None) -> "Series":
         """
         Creates a new Series without copying (and checking) data.
         """
         out = Series(dtype=dtype)
         out._data = data
+        out._validity = validity
         return out
 
     @staticmethod
@@ -317,6 +606,96 @@ class Series(Collection):
                 return str
         return out
 
+    def _histogram_codes(self, codes: Optional[Sequence[int]] = None) -> Any:
+        """
+        Group codes of the rows (all 0 by default) for aggregation.histogram,
+        -1 for the missing ones so that they are skipped. None if all rows
+        are in group 0.
+        """
+        notna = self._notna()
+        if notna is None:
+            return codes
+        mask = bitmap.to_mask(notna, len(self))
+        if codes is None:
+            return array("q", [valid - 1 for valid in mask])
+        return array("q", [c if valid else -1 for c, valid in zip(codes, mask)])
+
+    def _moments(self) -> aggregation.Moments:
+        """
+        Cached count, mean, sum of squared deviations, min and max of the
+        non-missing values.
+        """
+        if "moments" not in self._cache:
+            self._cache["moments"] = aggregation.moments(self._valid_data())
+        return self._cache["moments"]
+
+    def _notna(self) -> Bitmap:
+        """
+        Cached bitmap of the non-missing rows, which also excludes NaN.
+        """
+        if "notna" not in self._cache:
+            notna = self._validity
+            if self._dtype == float:
+                nan_mask = map(operator.eq, self._data, self._data)
+                notna = bitmap.and_(notna, bitmap.from_mask(nan_mask, len(self)))
+            self._cache["notna"] = notna
+        return self._cache["notna"]
+
+    def _order(self) -> array:
+        """
+        Cached indices of the non-missing values, in ascending order of value.
+        """
+        if "order" not in self._cache:
+            data = self._data
+            notna = bitmap.valid(range(len(data)), self._notna(), len(data))
+            self._cache["order"] = array("q", sorted(notna, key=data.__getitem__))
+        return self._cache["order"]
+
+    def _ranks(self) -> Buffer:
+        """
+        Cached average ranks of the non-missing values (see aggregation.ranks),
+        in the order of _valid_data.
+        """
+        if "ranks" not in self._cache:
+            ranks = aggregation.ranks(self._data, self._order())
+            notna = self._notna()
+            if notna is not None:
+                ranks = array("d", bitmap.valid(ranks, notna, len(self)))
+            self._cache["ranks"] = ranks
+        return self._cache["ranks"]
+
+    def _sorted(self) -> Buffer:
+        """
+        Cached non-missing values, in ascending order.
+        """
+        if "sorted" not in self._cache:
+            if "order" in self._cache:
+                values: Iterable = map(self._data.__getitem__, self._cache["order"])
+            else:
+                values = sorted(self._valid_data())
+            self._cache["sorted"] = Series._buffer(values, self._dtype)
+        return self._cache["sorted"]
+
+    def _true_rows(self) -> array:
+        """
+        Indices of the rows of a boolean Series that are True, missing
+        values counting as False.
+        """
+        selected: Iterable = self._data
+        if self._validity is not None:
+            mask = bitmap.to_mask(self._validity, len(self))
+            selected = map(operator.and_, self._data, mask)
+        return array("q", compress(range(len(self)), selected))
+
+    def _valid_data(self) -> Buffer:
+        """
+        Buffer of the non-missing values.
+        """
+        notna = self._notna()
+        if notna is None:
+            return self._data
+        return Series._buffer(bitmap.valid(self._data, notna, len(self)), self._dtype)
+
     def _get_index(self, key: Union[int, slice, "Series"]) -> Collection[int]:
         if isinstance(key, int):
             return (key,)
@@ -328,7 +707,7 @@ class Series(Collection):
             if key.dtype == bool:
                 if len(key) != len(self):
                     raise IndexError(f"Expected Series of size {len(self)}")
-                return [i for i, value in enumerate(key) if value]
+                return key._true_rows()
             if key.dtype == int:
                 return key._data  # type: ignore
             raise IndexError(f"Can't index with Series of dtype {key.dtype}")
@@ -1,9 +1,18 @@
+from typing import Iterator, Union
+
 from .dataframe import DataFrame
 
 
-def read_csv(*args, **kwargs) -> DataFrame:
+def read_csv(*args, **kwargs) -> Union[DataFrame, Iterator[DataFrame]]:
     """
     Solely for compatibility with pandas. For better auto-completion and
     documentation use bears.DataFrame.read_csv.
     """
     return DataFrame.read_csv(*args, **kwargs)  # type: ignore
+
+
+def read_binary(*args, **kwargs) -> DataFrame:
+    """
+    Shortcut for bears.DataFrame.read_binary.
+    """
+    return DataFrame.read_binary(*args, **kwargs)
@@ -6,12 +6,18 @@ import bears as br
 if __name__ == "__main__":
     argparser = argparse.ArgumentParser(description="Describe a dataset")
     argparser.add_argument("filename")
+    argparser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="number of worker processes"
+    )
     args = argparser.parse_args()
 
     try:
-        df = br.DataFrame.read_csv(args.filename)[1:]
+        if args.filename.endswith(".bears"):
+            df = br.DataFrame.read_binary(args.filename)[1:]
+        else:
+            df = br.DataFrame.read_csv(args.filename)[1:]
         if isinstance(df, br.DataFrame):
-            df.describe()
+            df.describe(args.jobs)
         else:
             print("Invalid number of columns")
     except Exception as e:
@@ -1,27 +1,173 @@
+import json
 import numpy as np  # type: ignore
-import pickle
-from typing import Tuple
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+SOLVERS = ("gd", "newton", "lbfgs")
+MODEL_PATH = "weights"
+MODEL_VERSION = 1
+DTYPES = {"float64": np.float64, "float32": np.float32}
+
+# Called after every epoch (or iteration) with the model and the epoch's info,
+# training stops early if it returns True
+Callback = Callable[["LogisticRegression", Dict[str, Any]], Optional[bool]]
 
 
 class LogisticRegression:
-    def __init__(self, lr: float = 0.01, epochs: int = 21):
+    """
+    One-vs-rest logistic regression.
+
+    The "gd" solver runs epochs plain gradient steps. The "newton" (IRLS) and
+    "lbfgs" solvers minimize the mean log loss of every class, plus an L2
+    penalty alpha on the non-bias weights that keeps them finite on separable
+    classes, until the largest gradient component is below tol or max_iter
+    iterations. n_iter_ holds the iterations run for every class.
+
+    The weights are stored in dtype, float64 or float32, which the gd epochs
+    of fit and predict compute in. newton and lbfgs hold X in dtype but solve
+    in float64, and fit_stream computes in the dtype of its batches. fit and
+    predict copy X once, and the gd epochs run in place in buffers allocated
+    before the first one.
+
+    fit and fit_stream call their callbacks after every epoch (every
+    iteration of every class for newton and lbfgs) with a dict holding the
+    solver, epoch, loss (mean log loss of the weights the epoch started
+    from, without the L2 penalty), grad_norm (norm of the mean gradient of
+    that loss), seconds, elapsed, rows and rows_per_s, and the target for
+    newton and lbfgs, whose loss and grad_norm are those of the target's
+    class alone. History records them.
+    """
+
+    def __init__(
+        self,
+        lr: float = 0.01,
+        epochs: int = 21,
+        solver: str = "gd",
+        tol: float = 1e-4,
+        max_iter: int = 100,
+        alpha: float = 1e-4,
+        dtype: str = "float64",
+    ):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}")
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype {dtype!r}, expected one of {DTYPES}")
         self.lr = lr
         self.epochs = epochs
+        self.solver = solver
+        self.tol = tol
+        self.max_iter = max_iter
+        self.alpha = alpha
+        self.dtype = dtype
 
-    def fit(self, X, y):
-        X = np.insert(X, 0, 1, axis=1)
-        m = X.shape[1]
+    def fit(self, X, y, callbacks: Iterable[Callback] = ()):
+        # Transposed, with the bias row, so that rows of weights.dot(X_t) and
+        # columns of X_t.T are contiguous
+        X_t = self._with_bias_t(X)
+        m = X_t.shape[0]
         self.targets = np.unique(y)
 
-        self.weights = np.zeros(len(self.targets) * m).reshape(len(self.targets), m)
+        self.weights = np.zeros((len(self.targets), m), dtype=self.dtype)
+
+        y_hot = np.asarray(y) == self.targets[:, np.newaxis]
+        y_hot = y_hot.astype(self.dtype)
+        progress = _Progress(self, callbacks) if callbacks else None
+
+        if self.solver != "gd":
+            solve = self._newton if self.solver == "newton" else self._lbfgs
+            self.n_iter_ = np.zeros(len(self.targets), dtype=int)
+            for i, target in enumerate(self.targets):
+                notify = None
+                if progress is not None:
+                    notify = progress.bind(len(X_t[0]), target=str(target))
+                self.weights[i], self.n_iter_[i] = solve(X_t.T, y_hot[i], notify)
+            return
+
+        pred = np.empty(y_hot.shape, dtype=self.dtype)
+        grad = np.empty(self.weights.shape, dtype=self.dtype)
+        step = DTYPES[self.dtype](self.lr / m)
+        n_iter = self.epochs
+        for epoch in range(self.epochs):
+            np.dot(self.weights, X_t, out=pred)
+            self._sigmoid_inplace(pred)
+            if progress is not None:
+                loss = _log_loss(pred, y_hot)
+            pred -= y_hot
+            np.dot(pred, X_t.T, out=grad)
+            if progress is not None:
+                grad_norm = np.linalg.norm(grad) / len(X_t[0])
+            grad *= step
+            self.weights -= grad
+            if progress is not None and progress(
+                epoch + 1, loss, grad_norm, len(X_t[0])
+            ):
+                n_iter = epoch + 1
+                break
+        self.n_iter_ = np.full(len(self.targets), n_iter)
 
-        y_hot = np.zeros((len(self.targets), len(y)))
-        for i in range(len(self.targets)):
-            y_hot[i] = np.where(y == self.targets[i], 1, 0)
+    def partial_fit(self, X, y, targets=None):
+        """
+        One gradient step on the mini-batch X, y. The first call initializes
+        the weights, with targets (all the classes of the dataset) if given,
+        with the classes present in y otherwise.
+        """
+        if not hasattr(self, "weights"):
+            self._init_weights(X.shape[1], y if targets is None else targets)
+        self._partial_fit(X, y)
 
-        for _ in range(self.epochs):
-            pred = self.sigmoid(self.weights.dot(X.T))
-            self.weights -= (self.lr / m) * (pred - y_hot).dot(X)
+    def _init_weights(self, n_features: int, targets) -> None:
+        self.targets = np.unique(targets)
+        self.weights = np.zeros((len(self.targets), n_features + 1), dtype=self.dtype)
+
+    def _partial_fit(self, X, y) -> Tuple[float, float]:
+        """The step of partial_fit, returns the loss and gradient norm"""
+        y_hot = np.asarray(y) == self.targets[:, np.newaxis]
+        # The bias column is kept apart instead of being inserted into X
+        pred = self.sigmoid(self.weights[:, 1:].dot(X.T) + self.weights[:, :1])
+        loss = _log_loss(pred, y_hot)
+        error = pred - y_hot
+        grad_bias = error.mean(axis=1)
+        grad = error.dot(X) / len(X)
+        self.weights[:, 0] -= self.lr * grad_bias
+        self.weights[:, 1:] -= self.lr * grad
+        return loss, np.sqrt(np.sum(grad**2) + np.sum(grad_bias**2))
+
+    def fit_stream(
+        self,
+        batches: Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]],
+        targets,
+        batch_size: int = 32,
+        buffer_size: int = 4096,
+        seed: Optional[int] = None,
+        callbacks: Iterable[Callback] = (),
+    ):
+        """
+        Mini-batch gradient descent over a dataset that doesn't fit in memory.
+        batches is called once per epoch and returns an iterable of (X, y)
+        chunks, such as the chunks of a csv read by blocks. Chunks are buffered
+        until they hold buffer_size rows, so up to buffer_size rows plus a
+        whole chunk are held at once, and twice as many while they are
+        shuffled: the chunk size bounds memory as much as buffer_size does.
+        The loss and gradient norm given to callbacks are averaged over the
+        mini-batches of the epoch.
+        """
+        rng = np.random.RandomState(seed)
+        progress = _Progress(self, callbacks) if callbacks else None
+        for epoch in range(self.epochs):
+            rows = 0
+            loss = grad_norm = 0.0
+            for X, y in minibatches(batches(), batch_size, buffer_size, rng):
+                if not hasattr(self, "weights"):
+                    self._init_weights(X.shape[1], targets)
+                batch_loss, batch_grad_norm = self._partial_fit(X, y)
+                rows += len(X)
+                loss += batch_loss * len(X)
+                grad_norm += batch_grad_norm * len(X)
+            if progress is not None and progress(
+                epoch + 1, loss / max(rows, 1), grad_norm / max(rows, 1), rows
+            ):
+                break
 
     @staticmethod
     def sigmoid(x: float):
@@ -29,15 +175,254 @@ class LogisticRegression:
 
     @staticmethod
     def accuracy(y, y_pred) -> Tuple[float, int]:
-        same = (y.values == y_pred).sum()
+        same = (np.asarray(y) == np.asarray(y_pred)).sum()
         return same / len(y), len(y) - same
 
     def predict(self, X):
-        X = np.insert(X, 0, 1, axis=1)
-        pred = self.sigmoid(self.weights.dot(X.T)).T
-        return [self.targets[x] for x in pred.argmax(1)]
-
-    def save_model(self, X_mean, X_std):
-        data = {"model": self, "X_mean": X_mean, "X_std": X_std}
-        with open("weights", "wb") as f:
-            pickle.dump(data, f)
+        # The sigmoid is increasing, so the largest score has the largest
+        # probability
+        scores = np.dot(np.asarray(X, dtype=self.weights.dtype), self.weights[:, 1:].T)
+        scores += self.weights[:, 0]
+        return self.targets[scores.argmax(1)].tolist()
+
+    def save_model(self, X_mean, X_std, features, path: str = MODEL_PATH):
+        """
+        Writes the weights, classes, feature names and normalization
+        statistics as plain arrays of an npz archive, which load_model reads
+        back without unpickling anything.
+        """
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(MODEL_VERSION),
+                weights=self.weights,
+                targets=np.array(self.targets, dtype=str),
+                features=np.array(features, dtype=str),
+                mean=np.asarray(X_mean, dtype=float),
+                std=np.asarray(X_std, dtype=float),
+            )
+
+    @staticmethod
+    def load_model(
+        path: str = MODEL_PATH,
+    ) -> Tuple["LogisticRegression", List[str], np.ndarray, np.ndarray]:
+        """
+        Returns the model saved by save_model, its feature names and their
+        mean and standard deviation on the training set.
+        """
+        with np.load(path, allow_pickle=False) as f:
+            version = int(f["version"])
+            if version > MODEL_VERSION:
+                raise ValueError(f"Unsupported model version {version}")
+            model = LogisticRegression(dtype=str(f["weights"].dtype))
+            model.weights = f["weights"]
+            model.targets = f["targets"]
+            return model, f["features"].tolist(), f["mean"], f["std"]
+
+    def _with_bias_t(self, X) -> np.ndarray:
+        X_t = np.empty((X.shape[1] + 1, X.shape[0]), dtype=self.dtype)
+        X_t[0] = 1
+        X_t[1:] = X.T
+        return X_t
+
+    @staticmethod
+    def _sigmoid_inplace(x: np.ndarray) -> None:
+        np.negative(x, out=x)
+        np.exp(x, out=x)
+        x += 1
+        np.reciprocal(x, out=x)
+
+    def _loss_grad(self, X, y, w) -> Tuple[float, np.ndarray, np.ndarray]:
+        """Penalized mean log loss of one class, its gradient and predictions"""
+        z = X.dot(w)
+        penalty = np.r_[0, w[1:]]
+        loss = np.mean(np.logaddexp(0, z) - y * z) + self.alpha / 2 * w[1:].dot(w[1:])
+        pred = self.sigmoid(z)
+        return loss, X.T.dot(pred - y) / len(X) + self.alpha * penalty, pred
+
+    def _unpenalized(self, w, loss, grad) -> Tuple[float, float]:
+        """
+        The mean log loss and gradient norm reported to callbacks, as gd
+        reports them: without the L2 penalty of _loss_grad
+        """
+        loss = loss - self.alpha / 2 * w[1:].dot(w[1:])
+        return loss, np.linalg.norm(grad - self.alpha * np.r_[0, w[1:]])
+
+    def _line_search(self, X, y, w, loss, grad, direction):
+        """Backtracks from a unit step until the Armijo condition holds"""
+        slope = grad.dot(direction)
+        step = 1.0
+        while True:
+            new_loss, new_grad, pred = self._loss_grad(X, y, w + step * direction)
+            if new_loss <= loss + 1e-4 * step * slope or step < 1e-10:
+                return step, new_loss, new_grad, pred
+            step /= 2
+
+    def _newton(self, X, y, notify=None) -> Tuple[np.ndarray, int]:
+        w = np.zeros(X.shape[1])
+        loss, grad, pred = self._loss_grad(X, y, w)
+        penalty = np.full(len(w), self.alpha)
+        penalty[0] = 1e-10
+        for n_iter in range(self.max_iter):
+            if np.abs(grad).max() < self.tol:
+                return w, n_iter
+            start = self._unpenalized(w, loss, grad) if notify is not None else None
+            hessian = (X.T * (pred * (1 - pred))).dot(X) / len(X) + np.diag(penalty)
+            direction = -np.linalg.solve(hessian, grad)
+            step, loss, grad, pred = self._line_search(X, y, w, loss, grad, direction)
+            w = w + step * direction
+            if notify is not None and notify(n_iter + 1, *start):
+                return w, n_iter + 1
+        return w, self.max_iter
+
+    def _lbfgs(self, X, y, notify=None, memory: int = 10) -> Tuple[np.ndarray, int]:
+        w = np.zeros(X.shape[1])
+        loss, grad, _ = self._loss_grad(X, y, w)
+        steps: List[Tuple[np.ndarray, np.ndarray]] = []
+        for n_iter in range(self.max_iter):
+            if np.abs(grad).max() < self.tol:
+                return w, n_iter
+            start = self._unpenalized(w, loss, grad) if notify is not None else None
+            # Two-loop recursion: direction = -(inverse Hessian estimate) grad
+            q = grad.copy()
+            coefs = []
+            for s, g in reversed(steps):
+                coef = s.dot(q) / g.dot(s)
+                coefs.append(coef)
+                q -= coef * g
+            if steps:
+                s, g = steps[-1]
+                q *= s.dot(g) / g.dot(g)
+            for (s, g), coef in zip(steps, reversed(coefs)):
+                q += s * (coef - g.dot(q) / g.dot(s))
+            direction = -q
+
+            step, loss, new_grad, _ = self._line_search(X, y, w, loss, grad, direction)
+            s = step * direction
+            g = new_grad - grad
+            if g.dot(s) > 1e-10:
+                steps = [*steps[-memory + 1 :], (s, g)]
+            w = w + s
+            grad = new_grad
+            if notify is not None and notify(n_iter + 1, *start):
+                return w, n_iter + 1
+        return w, self.max_iter
+
+
+class History:
+    """
+    Callback keeping the info of every epoch in records, optionally writing
+    them to path as JSON lines and printing them. With stop_on_divergence,
+    stops training when the loss isn't finite or rises above the loss of the
+    first epoch (of the same target).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        verbose: bool = False,
+        stop_on_divergence: bool = False,
+    ):
+        self.records: List[Dict[str, Any]] = []
+        self.verbose = verbose
+        self.stop_on_divergence = stop_on_divergence
+        self.first_loss: Dict[Optional[str], float] = {}
+        self.file = open(path, "w") if path is not None else None
+
+    def __call__(self, model: "LogisticRegression", info: Dict[str, Any]) -> bool:
+        self.records.append(info)
+        if self.file is not None:
+            self.file.write(json.dumps(info) + "\n")
+            self.file.flush()
+        if self.verbose:
+            target = f" {info['target']}" if "target" in info else ""
+            print(
+                f"{info['solver']}{target} epoch {info['epoch']}:"
+                f" loss {info['loss']:.6f}, grad norm {info['grad_norm']:.3g},"
+                f" {info['seconds'] * 1000:.2f}ms, {info['rows_per_s']:,.0f} rows/s"
+            )
+        first = self.first_loss.setdefault(info.get("target"), info["loss"])
+        diverged = not np.isfinite(info["loss"]) or info["loss"] > first
+        return self.stop_on_divergence and diverged
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+class _Progress:
+    """Times the epochs of a fit and passes their info to the callbacks"""
+
+    def __init__(self, model: LogisticRegression, callbacks: Iterable[Callback]):
+        self.model = model
+        self.callbacks = list(callbacks)
+        self.start = self.last = perf_counter()
+
+    def __call__(
+        self, epoch: int, loss: float, grad_norm: float, rows: int, **extra: Any
+    ) -> bool:
+        """Returns whether a callback asked to stop"""
+        now = perf_counter()
+        seconds = now - self.last
+        info = {
+            "solver": self.model.solver,
+            "epoch": epoch,
+            "loss": float(loss),
+            "grad_norm": float(grad_norm),
+            "seconds": seconds,
+            "elapsed": now - self.start,
+            "rows": rows,
+            "rows_per_s": rows / seconds if seconds else float("inf"),
+            **extra,
+        }
+        stop = False
+        for callback in self.callbacks:
+            stop = bool(callback(self.model, info)) or stop
+        # The callbacks' time isn't the next epoch's
+        self.last = perf_counter()
+        return stop
+
+    def bind(self, rows: int, **extra: Any) -> Callable[[int, float, float], bool]:
+        return lambda epoch, loss, grad_norm: self(
+            epoch, loss, grad_norm, rows, **extra
+        )
+
+
+def _log_loss(pred: np.ndarray, y_hot: np.ndarray) -> float:
+    """Mean binary log loss over every class and row"""
+    eps = 1e-15
+    p = np.clip(pred, eps, 1 - eps)
+    return float(-np.mean(y_hot * np.log(p) + (1 - y_hot) * np.log(1 - p)))
+
+
+def minibatches(
+    chunks: Iterable[Tuple[np.ndarray, np.ndarray]],
+    batch_size: int,
+    buffer_size: int,
+    rng: np.random.RandomState,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Re-slices (X, y) chunks into mini-batches of batch_size rows, shuffled
+    within a buffer of at least buffer_size rows.
+    """
+    buffer_X, buffer_y, buffered = [], [], 0
+    for X, y in chunks:
+        buffer_X.append(X)
+        buffer_y.append(np.asarray(y))
+        buffered += len(X)
+        if buffered < max(buffer_size, batch_size):
+            continue
+        X, y = _shuffled(buffer_X, buffer_y, rng)
+        full = len(X) - len(X) % batch_size
+        for start in range(0, full, batch_size):
+            yield X[start : start + batch_size], y[start : start + batch_size]
+        buffer_X, buffer_y, buffered = [X[full:]], [y[full:]], len(X) - full
+    if buffered:
+        X, y = _shuffled(buffer_X, buffer_y, rng)
+        for start in range(0, len(X), batch_size):
+            yield X[start : start + batch_size], y[start : start + batch_size]
+
+
+def _shuffled(buffer_X, buffer_y, rng):
+    order = rng.permutation(sum(len(X) for X in buffer_X))
+    return np.concatenate(buffer_X)[order], np.concatenate(buffer_y)[order]
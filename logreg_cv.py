@@ -0,0 +1,96 @@
+import numpy as np  # type: ignore
+import bears as br
+import argparse
+from time import perf_counter
+from logreg import SOLVERS
+from logreg_train import FEATURES
+import search
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dataset", help="dataset for cross-validation")
+    parser.add_argument("--folds", "-k", type=int, default=5, help="number of folds")
+    parser.add_argument(
+        "--stratified",
+        default=False,
+        action="store_true",
+        help="keep the proportion of every house in every fold",
+    )
+    parser.add_argument(
+        "--all",
+        "-a",
+        default=False,
+        action="store_true",
+        help="use all features for training",
+    )
+    parser.add_argument("--lr", "-l", type=float, help="learning rate", default=0.01)
+    parser.add_argument(
+        "--epochs", "-e", type=int, help="number of epochs", default=100
+    )
+    parser.add_argument("--solver", "-s", choices=SOLVERS, default="gd")
+    parser.add_argument(
+        "--tol",
+        type=float,
+        default=1e-4,
+        help="largest gradient component to stop at (newton, lbfgs)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="processes the folds run in, all the CPUs by default",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the folds")
+
+    args = parser.parse_args()
+
+    if args.lr >= 1 or args.lr <= 0:
+        print("lr should be between 0 and 1.")
+        exit(1)
+
+    if args.epochs < 1 or args.tol <= 0:
+        print("Number of epochs and tol should be > 0.")
+        exit(1)
+
+    try:
+        train = br.read_csv(args.dataset)
+    except Exception as e:
+        print("Something wrong with dataset file:", e.args)
+        exit(1)
+
+    try:
+        features = list(train.columns[6:]) if args.all else FEATURES
+        config = search.Config(
+            args.solver,
+            args.lr,
+            args.epochs,
+            args.tol,
+            "all" if args.all else "six",
+            tuple(range(len(features))),
+        )
+        start = perf_counter()
+        results = search.cross_validate(
+            train.to_numpy(features, na_value=0),
+            np.asarray(train["Hogwarts House"]),
+            config,
+            args.folds,
+            args.stratified,
+            args.jobs,
+            args.seed,
+        )
+        elapsed = perf_counter() - start
+    except Exception as e:
+        print("Something wrong with cross-validation:", e.args)
+        exit(1)
+
+    print(f"{'fold':>4} {'train':>6} {'val':>6} {'accuracy':>8} {'fit time':>9}")
+    for fold, train_rows, val_rows, accuracy, seconds in results:
+        print(
+            f"{fold:>4} {train_rows:>6} {val_rows:>6} {accuracy:>8.4f}"
+            f" {seconds:>8.3f}s"
+        )
+    accuracies = np.array([result.accuracy for result in results])
+    print(f"Accuracy: {accuracies.mean():.4f} +/- {accuracies.std():.4f}")
+    print(f"{len(results)} folds in {elapsed:.2f}s")
@@ -1,49 +1,55 @@
-import pandas as pd  # type: ignore
 import argparse
-import pickle
+import csv
+import bears as br
+from logreg import MODEL_PATH, LogisticRegression
+
+
+def predict_chunks(LR, chunks, features, X_mean, X_std):
+    """
+    (indices, houses) of every chunk, standardized with the training
+    statistics so that predictions don't depend on how the file is split.
+    """
+    for chunk in chunks:
+        X = chunk.to_numpy(features, na_value=0)
+        yield list(chunk["Index"]), LR.predict((X - X_mean) / X_std)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("dataset", help="dataset for training")
+    parser.add_argument("--model", "-m", default=MODEL_PATH, help="model file")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1 << 14,
+        help="rows read and predicted at once",
+    )
+    parser.add_argument(
+        "--output", "-o", default="houses.csv", help="prediction file to write"
+    )
 
     args = parser.parse_args()
 
-    try:
-        test = pd.read_csv(args.dataset).fillna(0)
-    except Exception as e:
-        print("Something wrong with dataset file:", e.args)
+    if args.chunk_size < 1:
+        print("Chunk size should be > 0.")
         exit(1)
 
     try:
-        with open("weights", "rb") as f:
-            model = pickle.load(f)
-            LR = model["model"]
-            X_mean = model["X_mean"]
-            X_std = model["X_std"]
+        LR, features, X_mean, X_std = LogisticRegression.load_model(args.model)
     except Exception as e:
         print("Something wrong with weights file:", e.args)
         exit(1)
 
     try:
-        if len(X_mean) == 6:
-            X = test[
-                [
-                    "Charms",
-                    "Flying",
-                    "Divination",
-                    "Ancient Runes",
-                    "Astronomy",
-                    "Herbology",
-                ]
-            ].values
-        else:
-            X = test[test.columns[6:]].values
-        X = (X - X.mean(axis=0)) / X.std(axis=0)
+        # Pinned, as a chunk can't widen the dtypes inferred from the first one
+        dtype = {name: float for name in features}
+        dtype["Hogwarts House"] = str
+        chunks = br.read_csv(args.dataset, chunksize=args.chunk_size, dtype=dtype)
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Index", "Hogwarts House"])
+            for indices, houses in predict_chunks(LR, chunks, features, X_mean, X_std):
+                writer.writerows(zip(indices, houses))
     except Exception as e:
         print("Something wrong with test:", e.args)
         exit(1)
-
-    y = LR.predict(X)
-    test["Hogwarts House"] = y
-    ans = test[["Index", "Hogwarts House"]]
-    ans.to_csv("houses.csv", index=False)
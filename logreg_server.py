@@ -0,0 +1,236 @@
+"""
+Prediction server: loads the model once and answers over HTTP.
+
+    POST /predict  {"rows": [{"Charms": -232.8, ...}, ...]}
+                   or {"rows": [[-232.8, ...], ...]} in the model's feature order
+                   -> {"houses": ["Ravenclaw", ...]}
+    GET  /stats    -> request, row and batch counters, latencies and throughput
+
+Rows of concurrent requests are micro-batched: a single thread stacks every
+row queued within --max-delay-ms (up to --max-batch rows) into one matrix and
+calls LogisticRegression.predict once for all of them. Missing values (null
+or absent features) count as 0, as they do in training.
+"""
+import argparse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import threading
+from time import perf_counter
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np  # type: ignore
+
+from logreg import MODEL_PATH, LogisticRegression
+
+# Number of recent requests latency percentiles are computed over
+LATENCY_WINDOW = 10000
+
+
+class Pending:
+    """Rows of one request, waiting for their predictions"""
+
+    def __init__(self, X: np.ndarray):
+        self.X = X
+        self.houses: Optional[List[str]] = None
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class Batcher:
+    """
+    Predicts the rows of the queued requests by batches.
+    """
+
+    def __init__(
+        self,
+        model: LogisticRegression,
+        mean: np.ndarray,
+        std: np.ndarray,
+        max_batch: int,
+        max_delay: float,
+    ):
+        self.model = model
+        self.mean = mean
+        self.std = std
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue: "queue.Queue[Pending]" = queue.Queue()
+        self.lock = threading.Lock()
+        self.start = perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.predict_seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def predict(self, X: np.ndarray) -> List[str]:
+        start = perf_counter()
+        pending = Pending(X)
+        self.queue.put(pending)
+        pending.done.wait()
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(perf_counter() - start)
+        if pending.error is not None:
+            raise pending.error
+        return pending.houses  # type: ignore
+
+    def run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            size = len(batch[0].X)
+            deadline = perf_counter() + self.max_delay
+            while size < self.max_batch:
+                timeout = deadline - perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                size += len(batch[-1].X)
+            self.flush(batch)
+
+    def flush(self, batch: List[Pending]) -> None:
+        start = perf_counter()
+        try:
+            X = np.concatenate([pending.X for pending in batch])
+            houses = self.model.predict((X - self.mean) / self.std)
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            return
+        seconds = perf_counter() - start
+        with self.lock:
+            self.rows += len(X)
+            self.batches += 1
+            self.predict_seconds += seconds
+        offset = 0
+        for pending in batch:
+            end = offset + len(pending.X)
+            pending.houses = [str(house) for house in houses[offset:end]]
+            offset = end
+            pending.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            uptime = perf_counter() - self.start
+            out = {
+                "uptime_s": uptime,
+                "requests": self.requests,
+                "rows": self.rows,
+                "batches": self.batches,
+                "mean_batch_rows": self.rows / self.batches if self.batches else 0,
+                "rows_per_s": self.rows / uptime,
+                "predict_s": self.predict_seconds,
+            }
+        for name, rank in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            value = latencies[int(rank * len(latencies))] if latencies else 0.0
+            out[f"latency_{name}_ms"] = value * 1000
+        return out
+
+
+def parse_rows(body: Dict[str, Any], features: List[str]) -> np.ndarray:
+    """Rows of a /predict request, as a float matrix in the features order"""
+    rows = body["rows"]
+    if not isinstance(rows, list):
+        raise ValueError("rows should be a list")
+    X = np.zeros((len(rows), len(features)))
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            row = [row.get(name) for name in features]
+        elif len(row) != len(features):
+            raise ValueError(f"Expected {len(features)} values, got {len(row)}")
+        X[i] = [0 if value is None else value for value in row]
+    return X
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts of clients would be refused with the default backlog of 5
+    request_queue_size = 1024
+
+
+def make_handler(batcher: Batcher, features: List[str]):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/stats":
+                self.reply(200, batcher.stats())
+            else:
+                self.reply(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self.reply(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                X = parse_rows(json.loads(self.rfile.read(length)), features)
+            except Exception as e:
+                self.reply(400, {"error": f"Invalid request: {e}"})
+                return
+            try:
+                houses = batcher.predict(X) if len(X) else []
+            except Exception as e:
+                self.reply(500, {"error": f"Prediction failed: {e}"})
+                return
+            self.reply(200, {"houses": houses})
+
+        def reply(self, status: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", "-p", type=int, default=8000, help="port")
+    parser.add_argument("--model", "-m", default=MODEL_PATH, help="model file")
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=1024,
+        help="rows above which a batch is predicted without waiting",
+    )
+    parser.add_argument(
+        "--max-delay-ms",
+        type=float,
+        default=2.0,
+        help="time the first request of a batch waits for others",
+    )
+
+    args = parser.parse_args()
+
+    if args.max_batch < 1 or args.max_delay_ms < 0:
+        print("max-batch should be > 0 and max-delay-ms >= 0.")
+        exit(1)
+
+    try:
+        LR, features, X_mean, X_std = LogisticRegression.load_model(args.model)
+    except Exception as e:
+        print("Something wrong with weights file:", e.args)
+        exit(1)
+
+    batcher = Batcher(LR, X_mean, X_std, args.max_batch, args.max_delay_ms / 1000)
+    server = Server((args.host, args.port), make_handler(batcher, features))
+    print(f"Serving {len(features)} features on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
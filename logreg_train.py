@@ -1,12 +1,85 @@
-import pandas as pd  # type: ignore
 import numpy as np  # type: ignore
+import bears as br
 import argparse
-from logreg import LogisticRegression
+from time import perf_counter
+from logreg import MODEL_PATH, SOLVERS, History, LogisticRegression
+import search
+
+FEATURES = [
+    "Charms",
+    "Flying",
+    "Divination",
+    "Ancient Runes",
+    "Astronomy",
+    "Herbology",
+]
+
+
+def read_chunks(dataset, features, chunk_size):
+    """(X, y) chunks of the dataset, read chunk_size rows at a time"""
+    # Pinned, as a chunk can't widen the dtypes inferred from the first one
+    dtype = {name: float for name in features}
+    dtype["Hogwarts House"] = str
+    for chunk in br.read_csv(dataset, chunksize=chunk_size, dtype=dtype):
+        yield chunk.to_numpy(features, na_value=0), np.asarray(chunk["Hogwarts House"])
+
+
+def stream_stats(chunks):
+    """
+    Mean and standard deviation of the features and the classes, in one pass
+    over the chunks (merging per-chunk moments with Chan's formula).
+    """
+    count, mean, m2 = 0, 0.0, 0.0
+    targets = set()
+    for X, y in chunks:
+        n = len(X)
+        if not n:
+            continue
+        chunk_mean = X.mean(axis=0)
+        delta = chunk_mean - mean
+        total = count + n
+        mean = mean + delta * n / total
+        m2 = m2 + ((X - chunk_mean) ** 2).sum(axis=0) + delta**2 * count * n / total
+        count = total
+        targets.update(y)
+    return mean, np.sqrt(m2 / count), sorted(targets)
+
+
+def train_stream(args, features, callbacks):
+    """
+    Mini-batch training holding --buffer-size rows plus a --chunk-size chunk
+    (16384 rows by default) in memory: one pass for the normalization
+    statistics, then one pass per epoch.
+    """
+    X_mean, X_std, targets = stream_stats(
+        read_chunks(args.dataset, features, args.chunk_size)
+    )
+
+    def normalized():
+        for X, y in read_chunks(args.dataset, features, args.chunk_size):
+            yield (X - X_mean) / X_std, y
+
+    LR = LogisticRegression(args.lr, args.epochs, dtype=args.dtype)
+    LR.fit_stream(
+        normalized,
+        targets,
+        args.batch_size,
+        args.buffer_size,
+        seed=args.seed,
+        callbacks=callbacks,
+    )
+
+    total = errors = 0
+    for X, y in normalized():
+        total += len(y)
+        errors += int((np.asarray(LR.predict(X)) != y).sum())
+    return LR, X_mean, X_std, (total - errors) / total, errors
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("dataset", help="dataset for training")
+    parser.add_argument("--model", "-m", default=MODEL_PATH, help="model file to write")
     parser.add_argument("--lr", "-l", type=float, help="learning rate", default=0.01)
     parser.add_argument(
         "--all",
@@ -18,8 +91,113 @@ if __name__ == "__main__":
     parser.add_argument(
         "--epochs", "-e", type=int, help="number of epochs", default=100
     )
+    parser.add_argument(
+        "--solver",
+        "-s",
+        choices=SOLVERS,
+        default="gd",
+        help="gradient descent for --epochs, or newton/lbfgs until convergence",
+    )
+    parser.add_argument(
+        "--tol",
+        type=float,
+        default=1e-4,
+        help="largest gradient component to stop at (newton, lbfgs)",
+    )
+    parser.add_argument(
+        "--max-iter",
+        type=int,
+        default=100,
+        help="maximum number of iterations (newton, lbfgs)",
+    )
+    parser.add_argument(
+        "--float32",
+        default=False,
+        action="store_true",
+        help="compute in single precision, which halves memory",
+    )
+    parser.add_argument(
+        "--batch-size",
+        "-b",
+        type=int,
+        default=None,
+        help="train by mini-batches of this size, streaming the dataset",
+    )
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=4096,
+        help="rows mini-batches are shuffled among (with --batch-size)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1 << 14,
+        help="rows read from the dataset at once (with --batch-size)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed of the mini-batch shuffling and of the --search split",
+    )
+    parser.add_argument(
+        "--log",
+        default=None,
+        help="write the loss, gradient norm and time of every epoch to this"
+        " file, as JSON lines",
+    )
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        default=False,
+        action="store_true",
+        help="print the loss, gradient norm and time of every epoch",
+    )
+    parser.add_argument(
+        "--stop-on-divergence",
+        default=False,
+        action="store_true",
+        help="stop when the loss rises above the loss of the first epoch",
+    )
+    parser.add_argument(
+        "--search",
+        default=False,
+        action="store_true",
+        help="pick the solver, lr, epochs, tol and features (the most important"
+        " or all of them) on a validation split, then train with the best ones",
+    )
+    parser.add_argument(
+        "--grid-lr",
+        type=float,
+        nargs="+",
+        default=[0.01, 0.1, 0.5],
+        help="learning rates tried by --search",
+    )
+    parser.add_argument(
+        "--grid-epochs",
+        type=int,
+        nargs="+",
+        default=[50, 100, 300],
+        help="numbers of epochs tried by --search",
+    )
+    parser.add_argument(
+        "--grid-tol",
+        type=float,
+        nargs="+",
+        default=[1e-2, 1e-4],
+        help="tolerances tried by --search",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="processes used by --search, all the CPUs by default",
+    )
 
     args = parser.parse_args()
+    args.dtype = "float32" if args.float32 else "float64"
 
     if args.lr >= 1 or args.lr <= 0:
         print("lr should be between 0 and 1.")
@@ -29,40 +207,137 @@ if __name__ == "__main__":
         print("Number of epochs should be > 0.")
         exit(1)
 
-    try:
-        train = pd.read_csv(args.dataset).fillna(0)
-    except Exception as e:
-        print("Something wrong with dataset file:", e.args)
+    if args.tol <= 0 or args.max_iter < 1:
+        print("tol and max-iter should be > 0.")
         exit(1)
 
-    try:
-        if args.all:
-            features = train.columns[6:]
-        else:
-            features = [
-                "Charms",
-                "Flying",
-                "Divination",
-                "Ancient Runes",
-                "Astronomy",
-                "Herbology",
-            ]
-
-        X = train[features].values
-        y = train["Hogwarts House"]
-
-        np.nanmean(X, axis=0)
-        X_mean = X.mean(axis=0)
-        X_std = X.std(axis=0)
-        X = (X - X_mean) / X_std
-    except Exception as e:
-        print("Something wrong with train:", e.args)
+    if args.search and (
+        not all(0 < lr < 1 for lr in args.grid_lr)
+        or not all(n > 0 for n in args.grid_epochs)
+        or not all(tol > 0 for tol in args.grid_tol)
+    ):
+        print("Grid values should follow the rules of lr, epochs and tol.")
+        exit(1)
+
+    if args.search and args.batch_size is not None:
+        print("--search doesn't support mini-batch training.")
+        exit(1)
+
+    if args.batch_size is not None and args.solver != "gd":
+        print("Mini-batch training only supports the gd solver.")
+        exit(1)
+
+    if args.batch_size is not None and (
+        args.batch_size < 1 or args.buffer_size < 1 or args.chunk_size < 1
+    ):
+        print("Batch, buffer and chunk sizes should be > 0.")
         exit(1)
 
-    LR = LogisticRegression(args.lr, args.epochs)
-    LR.fit(X, y)
+    history = None
+    if args.log is not None or args.verbose or args.stop_on_divergence:
+        try:
+            history = History(args.log, args.verbose, args.stop_on_divergence)
+        except OSError as e:
+            print("Something wrong with log file:", e.args)
+            exit(1)
+    callbacks = [] if history is None else [history]
+
+    try:
+        if args.batch_size is not None:
+            try:
+                if args.all:
+                    features = list(br.read_csv(args.dataset, nrows=1).columns[6:])
+                else:
+                    features = FEATURES
+                LR, X_mean, X_std, acc, err = train_stream(args, features, callbacks)
+            except Exception as e:
+                print("Something wrong with train:", e.args)
+                exit(1)
+            print("Accuracy on train:", acc)
+            print("Number of errors: ", err)
+            LR.save_model(X_mean, X_std, features, args.model)
+            exit(0)
+
+        try:
+            train = br.read_csv(args.dataset)
+        except Exception as e:
+            print("Something wrong with dataset file:", e.args)
+            exit(1)
+
+        if args.search:
+            try:
+                features = list(train.columns[6:])
+                start = perf_counter()
+                results = search.search(
+                    train.to_numpy(features, na_value=0),
+                    np.asarray(train["Hogwarts House"]),
+                    search.grid(
+                        args.grid_lr,
+                        args.grid_epochs,
+                        args.grid_tol,
+                        {
+                            "six": [features.index(name) for name in FEATURES],
+                            "all": range(len(features)),
+                        },
+                    ),
+                    n_jobs=args.jobs,
+                    seed=0 if args.seed is None else args.seed,
+                )
+                elapsed = perf_counter() - start
+            except Exception as e:
+                print("Something wrong with search:", e.args)
+                exit(1)
+            print(
+                f"{'solver':>6} {'lr':>5} {'epochs':>6} {'tol':>6} {'features':>8}"
+                f" {'val acc':>7} {'time':>7}"
+            )
+            for config, acc, seconds in results:
+                print(
+                    f"{config.solver:>6} {config.lr or '-':>5}"
+                    f" {config.epochs or '-':>6} {config.tol or '-':>6}"
+                    f" {config.feature_set:>8}"
+                    f" {acc:>7.4f} {seconds:>6.3f}s"
+                )
+            print(f"{len(results)} configurations in {elapsed:.2f}s")
+            best = results[0].config
+            print("Best:", best._replace(features=None))
+            args.solver = best.solver
+            args.lr = best.lr or args.lr
+            args.epochs = best.epochs or args.epochs
+            args.tol = best.tol or args.tol
+            args.all = best.feature_set == "all"
+
+        try:
+            if args.all:
+                features = list(train.columns[6:])
+            else:
+                features = FEATURES
+
+            X = train.to_numpy(features, na_value=0)
+            y = np.asarray(train["Hogwarts House"])
+
+            X_mean = X.mean(axis=0)
+            X_std = X.std(axis=0)
+            X = (X - X_mean) / X_std
+        except Exception as e:
+            print("Something wrong with train:", e.args)
+            exit(1)
+
+        LR = LogisticRegression(
+            args.lr, args.epochs, args.solver, args.tol, args.max_iter, dtype=args.dtype
+        )
+        LR.fit(X, y, callbacks)
 
-    acc, err = LR.accuracy(y, LR.predict(X))
-    print("Accuracy on train:", acc)
-    print("Number of errors: ", err)
-    LR.save_model(X_mean, X_std)
+        acc, err = LR.accuracy(y, LR.predict(X))
+        if args.solver != "gd":
+            print(
+                "Iterations per class:",
+                dict(zip(LR.targets.tolist(), LR.n_iter_.tolist())),
+            )
+        print("Accuracy on train:", acc)
+        print("Number of errors: ", err)
+        LR.save_model(X_mean, X_std, features, args.model)
+    finally:
+        # Flushes and closes the log file, even when training fails
+        if history is not None:
+            history.close()
@@ -1,26 +1,48 @@
 import bears as br
-import pandas as pd  # type: ignore
 import matplotlib.pyplot as plt  # type: ignore
+import render
 import argparse
 
+COLORS = {
+    "Ravenclaw": "blue",
+    "Slytherin": "green",
+    "Gryffindor": "red",
+    "Hufflepuff": "yellow",
+}
 
-def pair_plot(df):
-    y = df["Hogwarts House"].map(
-        {
-            "Ravenclaw": "blue",
-            "Slytherin": "green",
-            "Gryffindor": "red",
-            "Hufflepuff": "yellow",
-        }
-    )
-    axes = pd.plotting.scatter_matrix(df, c=y, figsize=(15, 12), s=10, diagonal="kde")
-    for ax in axes.flatten():
-        ax.xaxis.label.set_rotation(90)
-        ax.yaxis.label.set_rotation(45)
-        ax.yaxis.label.set_ha("right")
-        ax.set_xticklabels([], fontdict=None, minor=False)
-        ax.set_yticklabels([], fontdict=None, minor=False)
-    plt.show()
+
+def pair_data(df):
+    """
+    Values of every feature (all the columns after the first), which are the
+    coordinates of the points of every pair, and its binned KDE for the
+    diagonal. Each column is converted and estimated once, in O(n + bins).
+    """
+    features = df.columns[1:]
+    values = {name: list(df[name]) for name in features}
+    densities = {name: df[name].kde() for name in features}
+    return features, values, densities
+
+
+def pair_plot(columns):
+    df = render.dataset()[columns].dropna()
+    colors = list(df["Hogwarts House"].map(COLORS))
+    features, values, densities = pair_data(df)
+    n = len(features)
+    fig, axes = plt.subplots(n, n, figsize=(15, 12), squeeze=False)
+    for i, y in enumerate(features):
+        for j, x in enumerate(features):
+            ax = axes[i][j]
+            if i == j:
+                ax.plot(*densities[x])
+            else:
+                ax.scatter(values[x], values[y], c=colors, s=10)
+            if i == n - 1:
+                ax.set_xlabel(x, rotation=90)
+            if j == 0:
+                ax.set_ylabel(y, rotation=45, ha="right")
+            ax.set_xticks([])
+            ax.set_yticks([])
+    fig.subplots_adjust(wspace=0, hspace=0)
 
 
 if __name__ == "__main__":
@@ -33,27 +55,31 @@ if __name__ == "__main__":
         action="store_true",
         help="Display right correlation.",
     )
+    render.add_arguments(parser)
 
     args = parser.parse_args()
 
     try:
         df = br.read_csv("datasets/dataset_train.csv")
         if args.one:
-            pair_plot(
-                df[
-                    [
-                        "Hogwarts House",
-                        "Charms",
-                        "Flying",
-                        "Divination",
-                        "Ancient Runes",
-                        "Astronomy",
-                        "Herbology",
-                    ]
-                ].dropna()
-            )
+            columns = [
+                "Hogwarts House",
+                "Charms",
+                "Flying",
+                "Divination",
+                "Ancient Runes",
+                "Astronomy",
+                "Herbology",
+            ]
         else:
-            pair_plot(df[["Hogwarts House", *df.columns[6:]]].dropna())
+            columns = ["Hogwarts House", *df.columns[6:]]
+        render.render(
+            [render.Figure("pair_plot", pair_plot, (columns,))],
+            df,
+            args.output,
+            args.format,
+            args.jobs,
+        )
     except Exception as e:
         print("Something wrong with train:", ";".join(e.args))
         exit(1)
@@ -0,0 +1,137 @@
+"""
+Figures of the plotting scripts, either shown one after the other or, with
+--output, rendered to files by a pool of processes with the non-interactive
+Agg backend, along with an index.html listing them.
+
+The dataset is written once in the bears binary format, which every worker
+memory-maps when it starts instead of parsing the CSV again, so figures only
+carry the name of the drawing function and its arguments.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import html
+import os
+import re
+import tempfile
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import bears as br
+
+FORMATS = ("png", "svg")
+
+
+class Figure(NamedTuple):
+    # File name, without extension
+    name: str
+    # Draws on a new figure, with the dataset from render.dataset()
+    draw: Callable[..., None]
+    args: Tuple = ()
+
+
+# Set in every worker by _attach, and in the main process when showing
+_worker: Dict[str, Any] = {}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--output",
+        default=None,
+        metavar="DIR",
+        help="save the figures in DIR, with an index.html, instead of showing them",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="png",
+        help="file format of the figures saved by --output",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="processes rendering --output, all the CPUs by default",
+    )
+
+
+def dataset() -> br.DataFrame:
+    """The dataset given to render, in the process drawing a figure"""
+    return _worker["df"]
+
+
+def render(
+    figures: Sequence[Figure],
+    df: Optional[br.DataFrame] = None,
+    output: Optional[str] = None,
+    fmt: str = "png",
+    n_jobs: Optional[int] = None,
+) -> List[str]:
+    """
+    Shows every figure in turn, or saves them in the output directory in
+    n_jobs processes and writes an index of them. Returns the saved paths.
+    """
+    if output is None:
+        import matplotlib.pyplot as plt  # type: ignore
+
+        _worker["df"] = df
+        for figure in figures:
+            figure.draw(*figure.args)
+            plt.show()
+        return []
+
+    os.makedirs(output, exist_ok=True)
+    files = _file_names([figure.name for figure in figures], fmt)
+    paths = [os.path.join(output, file) for file in files]
+    path = None
+    try:
+        if df is not None:
+            fd, path = tempfile.mkstemp(suffix=".bears")
+            os.close(fd)
+            df.to_binary(path)
+        with ProcessPoolExecutor(
+            n_jobs, initializer=_attach, initargs=(path,)
+        ) as executor:
+            list(executor.map(_save, figures, paths))
+    finally:
+        if path is not None:
+            os.remove(path)
+    _write_index(output, [figure.name for figure in figures], files)
+    return paths
+
+
+def _attach(path: Optional[str]) -> None:
+    import matplotlib  # type: ignore
+
+    matplotlib.use("Agg")
+    _worker["df"] = None if path is None else br.DataFrame.read_binary(path)
+
+
+def _file_names(names: Sequence[str], fmt: str) -> List[str]:
+    """File names made of the figure names, numbered if they collide"""
+    files: List[str] = []
+    taken = set()
+    for name in names:
+        stem = re.sub(r"[^\w.-]+", "_", name)
+        file, n = f"{stem}.{fmt}", 1
+        while file in taken:
+            n += 1
+            file = f"{stem}_{n}.{fmt}"
+        taken.add(file)
+        files.append(file)
+    return files
+
+
+def _save(figure: Figure, path: str) -> None:
+    import matplotlib.pyplot as plt  # type: ignore
+
+    figure.draw(*figure.args)
+    plt.savefig(path)
+    plt.close("all")
+
+
+def _write_index(output: str, names: Sequence[str], files: Sequence[str]) -> None:
+    with open(os.path.join(output, "index.html"), "w") as f:
+        f.write("<!DOCTYPE html>\n<title>Figures</title>\n")
+        for name, file in zip(names, files):
+            name, file = html.escape(name), html.escape(file)
+            f.write(f'<h2>{name}</h2>\n<img src="{file}" alt="{name}">\n')
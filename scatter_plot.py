@@ -1,18 +1,50 @@
 import bears as br
 import matplotlib.pyplot as plt  # type: ignore
+import render
 import argparse
 
 
-def scatter_plot(df):
+def most_correlated(df, k):
+    """
+    The k pairs of numeric columns with the largest absolute Pearson
+    correlation, as (first, second, r), from a single correlation matrix.
+    """
+    corr = df.corr()
+    names = list(corr.columns)
+    matrix = [list(corr[name]) for name in names]
+    pairs = [
+        (names[i], names[j], matrix[j][i])
+        for i in range(len(names))
+        for j in range(i + 1, len(names))
+        if matrix[j][i] == matrix[j][i]
+    ]
+    pairs.sort(key=lambda pair: -abs(pair[2]))
+    return pairs[:k]
+
+
+def scatter_plot(first, second, r=None, bins=None):
+    """
+    Draws every student as a marker, or with bins the number of students in
+    each cell of a bins x bins grid, which costs the same on any number of
+    rows.
+    """
     plt.figure(figsize=(12, 9))
-    plt.title("How features correlate")
-    plt.xlabel(df.columns[0])
-    plt.ylabel(df.columns[1])
-    plt.scatter(
-        df[df.columns[0]], df[df.columns[1]], color="blue", label="students", s=10
-    )
+    if r is None:
+        plt.title("How features correlate")
+    else:
+        plt.title(f"How features correlate (r = {r:.3f})")
+    plt.xlabel(first)
+    plt.ylabel(second)
+    if bins is not None:
+        x_edges, y_edges, counts = render.dataset().histogram2d(first, second, bins)
+        # Empty cells are left blank
+        counts = [[c or float("nan") for c in row] for row in counts]
+        plt.pcolormesh(x_edges, y_edges, counts, cmap="viridis")
+        plt.colorbar(label="students")
+        return
+    df = render.dataset()[[first, second]].dropna()
+    plt.scatter(df[first], df[second], color="blue", label="students", s=10)
     plt.legend()
-    plt.show()
 
 
 if __name__ == "__main__":
@@ -37,18 +69,63 @@ if __name__ == "__main__":
         action="store_true",
         help="Display all correlations.",
     )
+    parser.add_argument(
+        "--top",
+        "-t",
+        type=int,
+        default=None,
+        help="Display the K most correlated pairs of courses.",
+        metavar="K",
+    )
+    parser.add_argument(
+        "--density",
+        "-d",
+        type=int,
+        default=None,
+        help="Draw the number of students on a BINS x BINS grid instead of"
+        " every student.",
+        metavar="BINS",
+    )
+    render.add_arguments(parser)
 
     flags = parser.parse_args()
 
+    if flags.top is not None and flags.top < 1:
+        print("K should be > 0.")
+        exit(1)
+
+    if flags.density is not None and flags.density < 1:
+        print("BINS should be > 0.")
+        exit(1)
+
     try:
-        if flags.one or not flags.all:
-            right_df = df[["Astronomy", "Defense Against the Dark Arts"]].dropna()
-            scatter_plot(right_df)
+        figures = []
+        if flags.one or not (flags.all or flags.top):
+            flags.top = max(flags.top or 0, 1)
+        if flags.top:
+            for first, second, r in most_correlated(
+                df[list(df.columns[6:])], flags.top
+            ):
+                figures.append(
+                    render.Figure(
+                        f"{first} - {second}",
+                        scatter_plot,
+                        (first, second, r, flags.density),
+                    )
+                )
         if flags.all:
+            columns = list(df.columns)
             for i in range(6, 18):
                 for j in range(i + 1, 19):
-                    iter_df = df[[df.columns[i], df.columns[j]]].dropna()
-                    scatter_plot(iter_df)
+                    first, second = columns[i], columns[j]
+                    figures.append(
+                        render.Figure(
+                            f"{first} - {second}",
+                            scatter_plot,
+                            (first, second, None, flags.density),
+                        )
+                    )
+        render.render(figures, df, flags.output, flags.format, flags.jobs)
     except Exception as e:
         print("Something wrong with train:", e.args)
         exit(1)
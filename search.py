@@ -0,0 +1,217 @@
+"""
+Parallel model selection: grid search over LogisticRegression settings and
+feature subsets, and k-fold cross-validation.
+
+The design matrix, the encoded labels and the splits are copied once into
+shared memory blocks, which every worker process maps when it starts, so
+tasks only carry their configuration instead of a pickled copy of the data.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import product
+from multiprocessing import shared_memory
+from time import perf_counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+from logreg import LogisticRegression
+
+
+class Config(NamedTuple):
+    solver: str
+    lr: float
+    epochs: int
+    tol: float
+    feature_set: str
+    features: Tuple[int, ...]
+
+
+class Result(NamedTuple):
+    config: Config
+    accuracy: float
+    seconds: float
+
+
+class FoldResult(NamedTuple):
+    fold: int
+    train_rows: int
+    val_rows: int
+    accuracy: float
+    seconds: float
+
+
+# (key, block name, shape, dtype) of a shared array
+_Spec = Tuple[str, str, Tuple[int, ...], str]
+
+# Set in every worker by _attach
+_worker: Dict[str, object] = {}
+
+
+def grid(
+    lrs: Sequence[float],
+    epochs: Sequence[int],
+    tols: Sequence[float],
+    feature_sets: Dict[str, Sequence[int]],
+    solvers: Sequence[str] = ("gd", "newton", "lbfgs"),
+) -> List[Config]:
+    """
+    Every feature set with gd for every lr and epochs, and with the other
+    solvers for every tol (the settings the solver doesn't use are None).
+    """
+    configs = []
+    for (name, features), solver in product(feature_sets.items(), solvers):
+        if solver == "gd":
+            settings = [(lr, n, None) for lr, n in product(lrs, epochs)]
+        else:
+            settings = [(None, None, tol) for tol in tols]
+        for lr, n, tol in settings:
+            configs.append(Config(solver, lr, n, tol, name, tuple(features)))
+    return configs
+
+
+def search(
+    X: np.ndarray,
+    y: np.ndarray,
+    configs: Sequence[Config],
+    val_size: float = 0.2,
+    n_jobs: Optional[int] = None,
+    seed: int = 0,
+) -> List[Result]:
+    """
+    Trains every configuration on the same random split of X, y in n_jobs
+    processes (all the CPUs by default) and returns their accuracy on the
+    validation rows, best first. Features are standardized with the
+    statistics of the training rows.
+    """
+    order = np.random.RandomState(seed).permutation(len(X))
+    n_val = int(len(X) * val_size)
+    if not 0 < n_val < len(X):
+        raise ValueError(f"val_size={val_size} leaves an empty split")
+    train = order[n_val:]
+    mean = X[train].mean(axis=0)
+    std = X[train].std(axis=0)
+    std[std == 0] = 1
+    _, codes = np.unique(y, return_inverse=True)
+
+    shared = {
+        "X": (X - mean) / std,
+        "y": codes,
+        "train": order[n_val:],
+        "val": order[:n_val],
+    }
+    with _shared_pool(shared, n_jobs) as executor:
+        results = list(executor.map(_evaluate, configs))
+    return sorted(results, key=lambda result: (-result.accuracy, result.seconds))
+
+
+def cross_validate(
+    X: np.ndarray,
+    y: np.ndarray,
+    config: Config,
+    k: int = 5,
+    stratified: bool = False,
+    n_jobs: Optional[int] = None,
+    seed: int = 0,
+) -> List[FoldResult]:
+    """
+    Trains config on every k - 1 of k random folds of X, y in n_jobs
+    processes (all the CPUs by default) and returns its accuracy on the
+    remaining fold, in the order of the folds. Features are standardized with
+    the statistics of the training folds. Stratified folds hold every class
+    in the same proportions as X.
+    """
+    if not 1 < k <= len(X):
+        raise ValueError(f"k={k} should be between 2 and the number of rows")
+    _, codes = np.unique(y, return_inverse=True)
+    rng = np.random.RandomState(seed)
+    folds = np.empty(len(X), dtype=np.int64)
+    if stratified:
+        # Deals the rows of every class to the folds in turn, carrying on
+        # from the fold the previous class stopped at
+        dealt = 0
+        for code in range(codes.max() + 1):
+            rows = rng.permutation(np.flatnonzero(codes == code))
+            folds[rows] = (dealt + np.arange(len(rows))) % k
+            dealt += len(rows)
+    else:
+        folds[rng.permutation(len(X))] = np.arange(len(X)) % k
+
+    with _shared_pool({"X": X, "y": codes, "folds": folds}, n_jobs) as executor:
+        return list(executor.map(_evaluate_fold, [config] * k, range(k)))
+
+
+def _attach(specs: List[_Spec]) -> None:
+    blocks = []
+    for key, name, shape, dtype in specs:
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        _worker[key] = np.ndarray(shape, dtype, buffer=block.buf)
+    # The blocks must outlive the arrays mapping them
+    _worker["blocks"] = blocks
+
+
+def _evaluate(config: Config) -> Result:
+    X, y = _worker["X"], _worker["y"]
+    accuracy, seconds = _fit_score(
+        config, X, y, _worker["train"], _worker["val"]  # type: ignore
+    )
+    return Result(config, accuracy, seconds)
+
+
+def _evaluate_fold(config: Config, fold: int) -> FoldResult:
+    X, y, folds = _worker["X"], _worker["y"], _worker["folds"]
+    train = np.flatnonzero(folds != fold)  # type: ignore
+    val = np.flatnonzero(folds == fold)  # type: ignore
+    mean = X[train].mean(axis=0)  # type: ignore
+    std = X[train].std(axis=0)  # type: ignore
+    std[std == 0] = 1
+    accuracy, seconds = _fit_score(
+        config, (X - mean) / std, y, train, val  # type: ignore
+    )
+    return FoldResult(fold, len(train), len(val), accuracy, seconds)
+
+
+def _fit_score(
+    config: Config, X: np.ndarray, y: np.ndarray, train: np.ndarray, val: np.ndarray
+) -> Tuple[float, float]:
+    """Accuracy on the val rows of config trained on the train rows, fit time"""
+    features = list(config.features)
+    model = LogisticRegression(
+        config.lr or 0.01,
+        config.epochs or 1,
+        config.solver,
+        tol=config.tol or 1e-4,
+    )
+    start = perf_counter()
+    model.fit(X[train][:, features], y[train])
+    seconds = perf_counter() - start
+    pred = np.asarray(model.predict(X[val][:, features]))
+    return float((pred == y[val]).mean()), seconds
+
+
+@contextmanager
+def _shared_pool(
+    arrays: Dict[str, np.ndarray], n_jobs: Optional[int]
+) -> Iterator[Executor]:
+    """
+    A process pool whose workers find arrays in _worker, mapped from shared
+    memory blocks that are released on exit.
+    """
+    blocks = []
+    try:
+        specs = []
+        for key, data in arrays.items():
+            data = np.ascontiguousarray(data)
+            block = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(data.shape, data.dtype, buffer=block.buf)[...] = data
+            specs.append((key, block.name, data.shape, data.dtype.str))
+        with ProcessPoolExecutor(
+            n_jobs, initializer=_attach, initargs=(specs,)
+        ) as executor:
+            yield executor
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
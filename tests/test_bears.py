@@ -0,0 +1,409 @@
+import math
+
+import pytest
+
+import bears as br
+
+
+def test_read_csv_int_overflow_in_last_block(tmp_path):
+    # The last block overflows 64 bits after the int blocks before it
+    path = tmp_path / "big.csv"
+    path.write_text("a\n" + "1\n" * 20000 + f"{10 ** 20}\n")
+    df = br.read_csv(str(path))
+    col = df["a"]
+    assert len(col) == df._nrows == 20001
+    assert col[19999].item() == 1
+    assert col[20000].item() == 10**20
+
+
+def test_append_int_overflow():
+    df = br.DataFrame([br.Series([1, 2, 3, 4])], ["a"])
+    df.append(br.DataFrame([br.Series([10**20])], ["a"]))
+    assert all(len(col) == df._nrows for col in df._cols)
+    assert list(df["a"]) == [1, 2, 3, 4, 10**20]
+
+
+def test_append_int_overflow_then_fits():
+    df = br.DataFrame([br.Series([1, 2])], ["a"])
+    df.append(br.DataFrame([br.Series([3, 10**20, 4])], ["a"]))
+    assert all(len(col) == df._nrows for col in df._cols)
+    assert list(df["a"]) == [1, 2, 3, 10**20, 4]
+
+
+def test_scalar_access_with_missing_values():
+    s = br.Series([None if i % 3 == 0 else i for i in range(10)])
+    assert s[0].item() is None and s[1].item() == 1 and s[-1].item() is None
+    s[0] = 5
+    s[1] = None
+    s[-2] = None
+    assert list(s) == [5, None, 2, None, 4, 5, None, 7, None, None]
+    s[1] = s[3] = s[6] = s[8] = s[9] = 0
+    assert s._validity is None
+
+
+def test_view_is_a_snapshot_of_the_columns():
+    df = br.DataFrame([br.Series([1, 2, 3]), br.Series([4, 5, 6])], ["x", "y"])
+    view = df[br.Series([True, False, True])]
+    df["x"] = br.Series([7, 8, 9])
+    assert list(view["x"]) == [1, 3]
+    assert list(df["x"]) == [7, 8, 9]
+
+
+def test_read_csv_widens_dtypes_past_the_sample(tmp_path):
+    path = tmp_path / "wide.csv"
+    rows = "".join(f"{i},{i}.5,\n" for i in range(2000))
+    path.write_text("a,b,c\n" + rows + "2.5,x,1\n")
+    df = br.read_csv(str(path))
+    assert df["a"].dtype == float and df["a"][2000].item() == 2.5
+    assert df["b"].dtype == str and df["b"][2000].item() == "x"
+    assert df["b"][0].item() == "0.5"
+    # Empty in the sample: float, which holds the ints after it
+    assert df["c"].dtype == float and df["c"][2000].item() == 1.0
+
+
+def test_read_csv_chunks_name_the_cell_that_breaks_the_schema(tmp_path):
+    path = tmp_path / "wide.csv"
+    path.write_text("a\n" + "1\n" * 2000 + "2.5\n")
+    with pytest.raises(TypeError, match="'2.5' at row 2001 of column 'a' to int"):
+        for _ in br.read_csv(str(path), chunksize=500):
+            pass
+
+
+def test_array_copy_keyword():
+    np = pytest.importorskip("numpy")
+    s = br.Series([1, 2, 3])
+    assert not np.asarray(s).flags.writeable
+    copied = np.array(s, copy=True)
+    copied[0] = 9
+    assert list(s) == [1, 2, 3]
+    with pytest.raises(ValueError):
+        np.array(br.Series([1, None]), copy=False)
+
+
+def test_boolean_mask_with_missing_values_selects_nothing_there():
+    s = br.Series([1, None, 3])
+    assert list(s == 0) == [False, None, False]
+    assert list(s[s == 0]) == []
+    assert list(s[s == 3]) == [3]
+    assert list(s[~(s == 3)]) == [1]
+
+
+def test_dataframe_mask_with_missing_values():
+    df = br.DataFrame([br.Series(["a", None, ""]), br.Series([1, 2, 3])], ["s", "n"])
+    assert list(df[df["s"] == ""]["n"]) == [3]
+    assert list(df[~(df["s"] == "a")]["n"]) == [3]
+
+
+def test_read_csv_widening_to_str_keeps_the_cells(tmp_path):
+    # Rows on both sides of the first block boundary must keep their text
+    path = tmp_path / "wide.csv"
+    path.write_text("a,b\n" + "0.50,000\n" * 20000 + "x,y\n")
+    df = br.read_csv(str(path))
+    for col, cell in (("a", "0.50"), ("b", "000")):
+        assert df[col].dtype == str
+        assert df[col][0].item() == cell
+        assert df[col][16383].item() == cell
+        assert df[col][16384].item() == cell
+        assert df[col][19999].item() == cell
+    assert df["a"][20000].item() == "x" and len(df["a"]) == 20001
+
+
+def test_append_while_numpy_holds_a_view():
+    np = pytest.importorskip("numpy")
+    df = br.DataFrame([br.Series([1, 2]), br.Series([0.5, None])], ["a", "b"])
+    view = np.asarray(df["a"])
+    df.append(br.DataFrame([br.Series([3]), br.Series([1.5])], ["a", "b"]))
+    assert all(len(col) == df._nrows == 3 for col in df._cols)
+    assert list(df["a"]) == [1, 2, 3]
+    assert list(df["b"].isna()) == [False, True, False]
+    assert df["b"][2].item() == 1.5
+    assert view.tolist() == [1, 2]
+
+
+def test_setitem_int_overflow():
+    s = br.Series([1, 2, 3])
+    s[1] = 10**20
+    s[s == 3] = [-(10**20)]
+    assert list(s) == [1, 10**20, -(10**20)]
+    assert s.max() == 10**20
+
+
+@pytest.mark.parametrize("i", [3, -4])
+def test_scalar_access_out_of_range(i):
+    s = br.Series([1, None, 3])
+    with pytest.raises(IndexError):
+        s[i]
+    with pytest.raises(IndexError):
+        s[i] = None
+    assert list(s) == [1, None, 3]
+
+
+def test_operators_give_the_python_results():
+    big = br.Series([2**62, -(2**62), 3])
+    assert list(big + big) == [2**63, -(2**63), 6]
+    assert list(big * 4) == [2**64, -(2**64), 12]
+    assert list(big - big * -1) == [2**63, -(2**63), 6]
+    assert list(br.Series([True, True]) + br.Series([True, False])) == [2, 1]
+    assert list(br.Series([1, 2]) / 2) == [0.5, 1.0]
+    assert list(br.Series([2**53 + 1]) < br.Series([float(2**53)])) == [False]
+    with pytest.raises(ZeroDivisionError):
+        br.Series([1.0, 2.0]) / br.Series([1.0, 0.0])
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_binary_round_trip(tmp_path, mmap):
+    columns = {
+        "b": br.Series([True, False, True]),
+        "i": br.Series([-(2**63), 0, 2**63 - 1]),
+        "f": br.Series([0.5, float("inf"), -2.0]),
+        "s": br.Series(["x", "", "x"]),
+    }
+    path = str(tmp_path / "df.bears")
+    br.DataFrame(list(columns.values()), list(columns)).to_binary(path)
+    df = br.DataFrame.read_binary(path, mmap=mmap)
+    assert list(df.columns) == list(columns)
+    for name, col in columns.items():
+        assert df[name].dtype == col.dtype and list(df[name]) == list(col)
+    # Copy-on-write: the file keeps its values
+    df["i"][0] = 1
+    df.append(df)
+    assert list(br.DataFrame.read_binary(path, mmap=mmap)["i"]) == list(columns["i"])
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_binary_round_trip_with_missing_values(tmp_path, mmap):
+    columns = {
+        "b": br.Series([None, False, True]),
+        "i": br.Series([1, None, 3]),
+        "f": br.Series([0.5, 1.5, None]),
+        "s": br.Series([None, "", "x"]),
+    }
+    path = str(tmp_path / "df.bears")
+    br.DataFrame(list(columns.values()), list(columns)).to_binary(path)
+    df = br.DataFrame.read_binary(path, mmap=mmap)
+    for name, col in columns.items():
+        assert df[name].dtype == col.dtype
+        assert list(df[name].isna()) == list(col.isna())
+        assert df[name]._validity == col._validity
+
+
+def test_read_binary_version_1(tmp_path):
+    # Version 1 is version 2 without validity bitmaps
+    path = tmp_path / "df.bears"
+    br.DataFrame([br.Series([1, 2]), br.Series(["a", "b"])], ["i", "s"]).to_binary(
+        str(path)
+    )
+    content = path.read_bytes()
+    assert b'"version": 2' in content
+    path.write_bytes(content.replace(b'"version": 2', b'"version": 1', 1))
+    df = br.DataFrame.read_binary(str(path))
+    assert list(df["i"]) == [1, 2] and list(df["s"]) == ["a", "b"]
+    assert df["i"]._validity is None
+
+
+def test_read_csv_chunks(tmp_path):
+    path = tmp_path / "chunks.csv"
+    path.write_text("a,b\n" + "".join(f"{i},{i % 3}.5\n" for i in range(10)))
+    chunks = list(br.read_csv(str(path), chunksize=4))
+    assert [len(chunk["a"]) for chunk in chunks] == [4, 4, 2]
+    assert all(list(chunk.columns) == ["a", "b"] for chunk in chunks)
+    assert all(chunk["a"].dtype == int for chunk in chunks)
+    assert [v for chunk in chunks for v in chunk["a"]] == list(range(10))
+    whole = br.read_csv(str(path))
+    assert [v for chunk in chunks for v in chunk["b"]] == list(whole["b"])
+    # nrows applies to the whole file, not to every chunk
+    chunks = list(br.read_csv(str(path), chunksize=4, nrows=5))
+    assert [v for chunk in chunks for v in chunk["a"]] == list(range(5))
+    with pytest.raises(ValueError):
+        br.read_csv(str(path), chunksize=0)
+
+
+def test_read_csv_chunks_of_an_empty_file(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("a,b\n")
+    chunks = list(br.read_csv(str(path), chunksize=4))
+    assert len(chunks) == 1 and list(chunks[0].columns) == ["a", "b"]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_agg_ignores_missing_values(n_jobs):
+    df = br.DataFrame(
+        [br.Series([1, None, 3, 4]), br.Series([True, False, None, False])], ["a", "b"]
+    )
+    funcs = ["count", "mean", "std", "min", "max", "25%", "50%"]
+    stats = df.agg(funcs, n_jobs=n_jobs)
+    assert list(stats.columns) == ["a", "b"]
+    assert list(stats["a"]) == pytest.approx([3, 8 / 3, (14 / 9) ** 0.5, 1, 4, 1, 3])
+    assert list(stats["b"]) == pytest.approx([3, 1 / 3, (2 / 9) ** 0.5, 0, 1, 0, 0])
+    with pytest.raises(ValueError):
+        br.DataFrame([br.Series(["x"])], ["s"]).agg(["count"])
+
+
+def test_cached_statistics_follow_mutations():
+    df = br.DataFrame([br.Series([3, 1, 2]), br.Series([1.0, 2.0, 3.0])], ["a", "b"])
+    s = df["a"]
+    funcs = ["count", "mean", "max", "50%"]
+    assert list(df.agg(funcs)["a"]) == [3, 2, 3, 2]
+    assert s.percentile(0.1) == 1
+    assert df.corr("spearman")["a"][1].item() == pytest.approx(-0.5)
+
+    s[0] = 0
+    assert list(df.agg(funcs)["a"]) == [3, 1, 2, 1]
+    assert df.corr("spearman")["a"][1].item() == pytest.approx(1)
+    assert s.percentile(0.6) == 1
+    s[1] = None
+    assert s.percentile(0.6) == 2 and s.mean() == 1
+
+    df.append(br.DataFrame([br.Series([5]), br.Series([0.0])], ["a", "b"]))
+    assert list(df.agg(funcs)["a"]) == pytest.approx([3, 7 / 3, 5, 2])
+    assert s.percentile(0.1) == 0
+    assert df.corr("spearman")["a"][1].item() == pytest.approx(-0.5)
+
+
+def test_groupby():
+    df = br.DataFrame(
+        [
+            br.Series(["b", "a", None, "b", "a", "b"]),
+            br.Series([1.0, 2.0, 3.0, None, 4.0, 6.0]),
+            br.Series(["u", "v", "w", "x", "y", "z"]),
+        ],
+        ["key", "x", "s"],
+    )
+    groups = df.groupby("key")
+    # Sorted keys, rows with a missing key in no group
+    assert len(groups) == groups.ngroups == 2
+    assert {k: list(v) for k, v in groups.groups.items()} == {
+        "a": [1, 4],
+        "b": [0, 3, 5],
+    }
+    assert list(groups.get_group("b")["s"]) == ["u", "x", "z"]
+    assert [k for k, _ in groups] == ["a", "b"]
+    # Only numeric columns are aggregated, missing values ignored
+    stats = groups.agg(["count", "mean", "max"])
+    assert list(stats.columns) == ["key", "x count", "x mean", "x max"]
+    assert list(stats["key"]) == ["a", "b"]
+    assert list(stats["x count"]) == [2, 2]
+    assert list(stats["x mean"]) == [3.0, 3.5]
+    assert list(groups.percentile(0.5)["x"]) == [4.0, 6.0]
+    assert list(groups["x"].min().columns) == ["key", "x"]
+    assert list(groups["x"].min()["x"]) == [2.0, 1.0]
+    with pytest.raises(ValueError):
+        groups["s"].agg(["count"])
+
+
+def test_groupby_float_key_skips_nan():
+    df = br.DataFrame(
+        [br.Series([2.0, None, 1.0, 2.0]), br.Series([1, 2, 3, 4])], ["k", "v"]
+    )
+    values = {k: list(group["v"]) for k, group in df.groupby("k")}
+    assert values == {1.0: [3], 2.0: [1, 4]}
+
+
+def test_histogram():
+    s = br.Series([0, 1, 1, 2, 4, None])
+    edges, counts = s.histogram(bins=4)
+    assert edges == [0, 1, 2, 3, 4]
+    # The last bin includes its upper edge, missing values are skipped
+    assert counts == [1, 2, 1, 1]
+    _, counts = s.histogram(bins=2, range=(1, 2))
+    assert counts == [2, 1]
+    _, densities = s.histogram(bins=4, density=True)
+    assert sum(densities) == pytest.approx(1)
+    with pytest.raises(ValueError):
+        br.Series(["a"]).histogram()
+
+
+def test_histogram_matches_numpy():
+    np = pytest.importorskip("numpy")
+    values = np.random.default_rng(0).normal(size=1000)
+    edges, counts = br.Series(values.tolist()).histogram(bins=13)
+    expected_counts, expected_edges = np.histogram(values, bins=13)
+    assert counts == expected_counts.tolist()
+    assert edges == pytest.approx(expected_edges.tolist())
+
+
+def test_groupby_histogram():
+    df = br.DataFrame(
+        [br.Series(["a", "b", "a", None]), br.Series([0.0, 1.0, 2.0, 2.0])],
+        ["k", "x"],
+    )
+    edges, counts = df.groupby("k")["x"].histogram(bins=2)
+    assert edges == [0.0, 1.0, 2.0]
+    assert counts == {"a": [1, 1], "b": [0, 1]}
+    assert df.groupby("k").histogram(bins=2) == {"x": (edges, counts)}
+
+
+def test_kde():
+    values = [0.0, 0.5, 1.0, 3.0]
+    grid, density = br.Series(values + [None]).kde(points=801, bandwidth=0.5)
+    # Spans the values widened by 4 bandwidths, where the kernel stops
+    assert grid[0] == -2.0 and grid[-1] == 5.0
+    step = grid[1] - grid[0]
+    assert sum(density) * step == pytest.approx(1, abs=1e-3)
+    for x, d in list(zip(grid, density))[::50]:
+        exact = sum(
+            math.exp(-0.5 * ((x - v) / 0.5) ** 2) / (0.5 * math.sqrt(2 * math.pi))
+            for v in values
+        ) / len(values)
+        assert d == pytest.approx(exact, abs=1e-3)
+    with pytest.raises(ValueError):
+        br.Series([None, None]).kde()
+
+
+def test_corr():
+    df = br.DataFrame(
+        [
+            br.Series([1, 2, 3, 4, None]),
+            br.Series([2.0, 4.0, 6.0, 8.0, 0.0]),
+            br.Series([1.0, 8.0, 27.0, 64.0, 125.0]),
+            br.Series(["a", "b", "c", "d", "e"]),
+        ],
+        ["a", "b", "c", "s"],
+    )
+    pearson = df.corr()
+    # Only numeric columns, each pair compared where neither is missing
+    assert list(pearson.columns) == ["a", "b", "c"]
+    assert list(pearson["a"]) == pytest.approx([1.0, 1.0, 0.951], abs=1e-3)
+    assert pearson["b"][2].item() == pytest.approx(pearson["c"][1].item())
+    assert pearson["b"][2].item() == pytest.approx(-0.298, abs=1e-3)
+    spearman = df.corr("spearman")
+    assert list(spearman["a"]) == pytest.approx([1.0, 1.0, 1.0])
+    assert spearman["b"][2].item() == pytest.approx(0.0)
+    with pytest.raises(ValueError):
+        df.corr("kendall")
+
+
+def test_corr_matches_pandas():
+    pd = pytest.importorskip("pandas")
+    data = {"x": [3.0, None, 1.0, 7.0, 2.0, 2.0], "y": [1, 5, 2, 3, 9, 4]}
+    expected = pd.DataFrame(data).corr("spearman")
+    df = br.DataFrame([br.Series(v) for v in data.values()], list(data))
+    assert list(df.corr("spearman")["x"]) == pytest.approx(expected["x"].tolist())
+
+
+def test_histogram2d():
+    df = br.DataFrame(
+        [
+            br.Series([0.0, 1.0, 2.0, 2.0, None]),
+            br.Series([0, 0, 1, 1, 1]),
+            br.Series(["a", "b", "a", None, "b"]),
+        ],
+        ["x", "y", "k"],
+    )
+    x_edges, y_edges, counts = df.histogram2d("x", "y", bins=(2, 2))
+    assert x_edges == [0.0, 1.0, 2.0] and y_edges == [0.0, 0.5, 1.0]
+    # One row per bin of y, rows where x or y is missing skipped
+    assert counts == [[1, 1], [0, 2]]
+    _, _, by_key = df.histogram2d("x", "y", bins=2, by="k")
+    assert by_key == {"a": [[1, 0], [0, 1]], "b": [[0, 1], [0, 0]]}
+    with pytest.raises(ValueError):
+        df.histogram2d("x", "k")
+
+
+def test_histogram2d_matches_numpy():
+    np = pytest.importorskip("numpy")
+    x, y = np.random.default_rng(0).normal(size=(2, 1000))
+    df = br.DataFrame([br.Series(x.tolist()), br.Series(y.tolist())], ["x", "y"])
+    _, _, counts = df.histogram2d("x", "y", bins=(7, 5))
+    expected, _, _ = np.histogram2d(x, y, bins=(7, 5))
+    assert counts == expected.T.astype(int).tolist()
@@ -0,0 +1,202 @@
+import json
+import pickle
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np  # type: ignore
+import pytest
+
+from logreg import SOLVERS, History, LogisticRegression
+import logreg_server
+
+
+@pytest.fixture
+def dataset():
+    """Three overlapping classes in 4 standardized features"""
+    rng = np.random.default_rng(0)
+    centers = 2 * rng.normal(size=(3, 4))
+    y = np.repeat(np.array(["a", "b", "c"]), 100)
+    X = centers[np.searchsorted(["a", "b", "c"], y)] + rng.normal(size=(300, 4))
+    return (X - X.mean(axis=0)) / X.std(axis=0), y
+
+
+def test_newton_and_lbfgs_reach_the_same_weights(dataset):
+    X, y = dataset
+    weights = {}
+    for solver in ("newton", "lbfgs"):
+        model = LogisticRegression(solver=solver, tol=1e-8, max_iter=200)
+        model.fit(X, y)
+        assert (model.n_iter_ < model.max_iter).all()
+        weights[solver] = model.weights
+    np.testing.assert_allclose(weights["newton"], weights["lbfgs"], atol=1e-5)
+
+
+def test_solvers_agree_on_predictions(dataset):
+    X, y = dataset
+    predictions = {}
+    for solver in SOLVERS:
+        model = LogisticRegression(lr=0.05, epochs=1000, solver=solver)
+        model.fit(X, y)
+        assert list(model.targets) == ["a", "b", "c"]
+        predictions[solver] = np.asarray(model.predict(X))
+    assert LogisticRegression.accuracy(y, predictions["newton"])[0] > 0.85
+    for solver in SOLVERS:
+        agreement = (predictions[solver] == predictions["newton"]).mean()
+        assert agreement > 0.98, solver
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_save_and_load_model(dataset, tmp_path, dtype):
+    X, y = dataset
+    model = LogisticRegression(solver="newton", dtype=dtype)
+    model.fit(X, y)
+    path = str(tmp_path / "weights")
+    features = ["w", "x", "y", "z"]
+    model.save_model(X.mean(axis=0), X.std(axis=0), features, path=path)
+    loaded, loaded_features, mean, std = LogisticRegression.load_model(path)
+    assert loaded_features == features
+    assert loaded.weights.dtype == np.dtype(dtype)
+    np.testing.assert_array_equal(loaded.weights, model.weights)
+    np.testing.assert_allclose(mean, X.mean(axis=0))
+    np.testing.assert_allclose(std, X.std(axis=0))
+    assert loaded.predict(X) == model.predict(X)
+
+
+def test_load_model_rejects_pickled_payloads(tmp_path):
+    path = str(tmp_path / "weights")
+    with open(path, "wb") as f:
+        pickle.dump(LogisticRegression(), f)
+    with pytest.raises(ValueError):
+        LogisticRegression.load_model(path)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            version=np.array(1),
+            weights=np.zeros((1, 2)),
+            targets=np.array([object()]),
+            features=np.array(["x"]),
+            mean=np.zeros(1),
+            std=np.ones(1),
+        )
+    with pytest.raises(ValueError):
+        LogisticRegression.load_model(path)
+
+
+@pytest.fixture
+def trained(dataset):
+    X, y = dataset
+    model = LogisticRegression(solver="newton")
+    model.fit(X, y)
+    return model, X
+
+
+def test_server_micro_batches_concurrent_requests(trained):
+    model, X = trained
+    # The first request waits long enough for all the others to be queued
+    batcher = logreg_server.Batcher(
+        model, np.zeros(4), np.ones(4), max_batch=1000, max_delay=0.5
+    )
+    chunks = np.array_split(X, 10)
+    results = [None] * len(chunks)
+
+    def predict(i):
+        results[i] = batcher.predict(chunks[i])
+
+    threads = [threading.Thread(target=predict, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Every request gets its own rows back
+    assert [house for houses in results for house in houses] == model.predict(X)
+    stats = batcher.stats()
+    assert stats["requests"] == 10 and stats["rows"] == len(X)
+    assert stats["batches"] < 10
+
+
+def test_server_answers_over_http(trained):
+    model, X = trained
+    features = ["w", "x", "y", "z"]
+    batcher = logreg_server.Batcher(model, np.zeros(4), np.ones(4), 1024, 0.0)
+    server = logreg_server.Server(
+        ("127.0.0.1", 0), logreg_server.make_handler(batcher, features)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        rows = [X[0].tolist(), dict(zip(features, X[1].tolist()))]
+        request = urllib.request.Request(
+            f"{url}/predict", json.dumps({"rows": rows}).encode("utf8")
+        )
+        with urllib.request.urlopen(request) as response:
+            assert json.load(response) == {"houses": model.predict(X[:2])}
+        request = urllib.request.Request(f"{url}/predict", b'{"rows": [[1, 2]]}')
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+INFO_KEYS = {
+    "solver",
+    "epoch",
+    "loss",
+    "grad_norm",
+    "seconds",
+    "elapsed",
+    "rows",
+    "rows_per_s",
+}
+
+
+@pytest.mark.parametrize("solver", SOLVERS)
+def test_callbacks_get_the_info_of_every_epoch(dataset, solver):
+    X, y = dataset
+    history = History()
+    model = LogisticRegression(epochs=5, solver=solver, max_iter=5)
+    model.fit(X, y, [history])
+    records = history.records
+    if solver == "gd":
+        assert [info["epoch"] for info in records] == [1, 2, 3, 4, 5]
+        assert all(set(info) == INFO_KEYS for info in records)
+    else:
+        # Every iteration of every class, with its target
+        assert [info["target"] for info in records] == [
+            target for target, n in zip("abc", model.n_iter_) for _ in range(n)
+        ]
+        assert all(set(info) == INFO_KEYS | {"target"} for info in records)
+    assert all(info["rows"] == len(X) and info["solver"] == solver for info in records)
+    # The loss of the weights each epoch starts from: log 2 for zero weights
+    assert records[0]["loss"] == pytest.approx(np.log(2))
+    assert records[-1]["loss"] < records[0]["loss"]
+
+
+@pytest.mark.filterwarnings("ignore:overflow:RuntimeWarning")
+def test_history_writes_json_lines_and_stops_on_divergence(dataset, tmp_path):
+    X, y = dataset
+    path = tmp_path / "log.jsonl"
+    history = History(str(path), stop_on_divergence=True)
+    # A step this large makes the loss rise after the first epoch
+    model = LogisticRegression(lr=0.9, epochs=50)
+    model.fit(X * 1000, y, [history])
+    history.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == history.records
+    assert 1 < len(lines) < 50
+    assert model.n_iter_[0] == len(lines)
+
+
+def test_a_callback_stops_fit_stream(dataset):
+    X, y = dataset
+    epochs = []
+
+    def stop_after_two(model, info):
+        epochs.append(info["epoch"])
+        return info["epoch"] == 2
+
+    model = LogisticRegression(epochs=10)
+    model.fit_stream(lambda: [(X, y)], ["a", "b", "c"], callbacks=[stop_after_two])
+    assert epochs == [1, 2]